@@ -14,39 +14,65 @@ REPORTS_DIR = OUTPUT_DIR / "reports"
 FINAL_VIDEOS_DIR = OUTPUT_DIR / "final_videos"
 AUDIO_DIR = OUTPUT_DIR / "audio"
 TEMP_DIR = OUTPUT_DIR / "temp"
+CACHE_DIR = OUTPUT_DIR / "cache"
 
 # Create directories if they don't exist
-for directory in [OUTPUT_DIR, CAPTIONS_DIR, FRAMES_DIR, REPORTS_DIR, FINAL_VIDEOS_DIR, AUDIO_DIR, TEMP_DIR]:
+for directory in [OUTPUT_DIR, CAPTIONS_DIR, FRAMES_DIR, REPORTS_DIR, FINAL_VIDEOS_DIR, AUDIO_DIR, TEMP_DIR, CACHE_DIR]:
     directory.mkdir(parents=True, exist_ok=True)
 
 # Video settings
 SUPPORTED_VIDEO_FORMATS = ['.mp4', '.mov', '.avi', '.mkv', '.webm', '.flv']
 SUPPORTED_AUDIO_FORMATS = ['.wav', '.mp3', '.m4a']
 
+# Audio settings
+STREAM_AUDIO = True  # Decode audio straight into memory for Whisper instead of writing a WAV file
+CACHE_DECODED_AUDIO = True  # Keep decoded audio in CACHE_DIR so re-runs on the same video skip FFmpeg
+AUDIO_CACHE_MAX_MB = 1024  # Oldest cached audio is evicted beyond this size (16-bit PCM, ~115 MB per hour)
+
 # Whisper settings
 WHISPER_MODEL = "base"  # Options: tiny, base, small, medium, large
 WHISPER_LANGUAGE = None  # None for auto-detection
+WHISPER_DEVICE = "auto"  # Options: "auto", "cuda", "cpu"
+WHISPER_COMPUTE_TYPE = None  # None picks per device (int8_float16 on GPU, int8 on CPU); or e.g. "float16"
+WHISPER_BEAM_SIZE = 1  # 1 = greedy decoding (fastest), 5 = reference Whisper default
+WHISPER_VAD_FILTER = True  # Skip silent regions before decoding
+WHISPER_GPU_BATCHED = True  # Use batched fp16 HuggingFace pipeline when a CUDA GPU is available
+WHISPER_BATCH_SIZE = 24  # 30-second windows decoded per GPU batch
 
 # Scene detection settings
-SCENE_CHANGE_THRESHOLD = 0.3  # SSIM threshold for scene changes (0-1)
-FRAME_SAMPLE_RATE = 1  # Process every Nth frame (1 = all frames)
-CLICK_DETECTION_THRESHOLD = 0.1  # Frame difference threshold for click detection
+SCENE_METRIC = "histogram"  # Options: "histogram" (fast, 4x4 regional histograms), "ssim"
+SCENE_CHANGE_THRESHOLD = 0.5  # Similarity (0-1) below which a scene change is detected (~0.3 suits "ssim")
+SCENE_PHASH_DISTANCE = 4  # With "ssim", skip SSIM when 64-bit perceptual hashes differ in <= N bits (0 = off)
+FRAME_SAMPLE_RATE = 30  # Compare every Nth frame (30 = ~1 s at 30 FPS, 1 = all frames)
+REFINE_SCENE_BOUNDARIES = True  # Binary-search the exact cut frame between samples
+CLICK_DETECTION_THRESHOLD = 0.1  # Mean difference (0-1) of the most-changed tile that counts as a click
+CLICK_TILE_SIZE = 32  # Tile size in pixels (on the 320px analysis frame) for click detection
 MIN_SCENE_DURATION = 2.0  # Minimum seconds between scene changes
+USE_DECORD = True  # Decode sampled frames in batches with decord when installed (falls back to OpenCV)
+DECODE_BATCH_SIZE = 32  # Frames per decord batch (a 1080p frame is ~6 MB)
+DECODE_THREADS = 4  # Decoder threads used by decord
+PREFETCH_FRAMES = 16  # Sampled frames decoded ahead of the comparison loop (bounds memory use)
+FRAME_JPEG_QUALITY = 82  # JPEG quality (0-100) of saved scene/key frames
 
 # Report settings
 REPORT_FORMAT = "docx"  # Options: "docx" or "pdf"
 INCLUDE_SCREENSHOTS = True
 INCLUDE_TRANSCRIPT = True
 INCLUDE_CLICK_LOG = True
+REPORT_IMAGE_WIDTH = 720  # Max width/height (px) of screenshots embedded in reports
+REPORT_IMAGE_QUALITY = 80  # JPEG quality of embedded screenshots
 
 # Caption settings
 CAPTION_FONT_SIZE = 24
 CAPTION_FONT_COLOR = "white"
 CAPTION_BACKGROUND_COLOR = "black"
 CAPTION_POSITION = "bottom"  # Options: "top", "bottom", "center"
+SOFT_SUBTITLES = False  # True = mux toggleable subtitles without re-encoding instead of burning them in
 
 # FFmpeg settings
 FFMPEG_QUALITY = "high"  # Options: "low", "medium", "high"
 OUTPUT_VIDEO_CODEC = "libx264"
+FFMPEG_PRESET = "veryfast"  # x264 preset: ultrafast ... veryfast ... medium ... veryslow
 OUTPUT_AUDIO_CODEC = "aac"
+USE_HW_ENCODER = True  # Use NVIDIA NVENC (h264_nvenc) when FFmpeg supports it, else libx264
 
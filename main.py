@@ -4,16 +4,20 @@ Main entry point - One-click script to process meeting videos
 """
 
 import sys
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import Optional
 import config
 
 # Import modules
 from modules.downloader import download_video
-from modules.audio_extractor import extract_audio
+from modules.audio_extractor import extract_audio, extract_audio_stream, WHISPER_SAMPLE_RATE
 from modules.transcription import transcribe_audio, generate_srt, get_full_transcript, get_segments
 from modules.scene_detection import detect_scenes, detect_clicks
 from modules.report_generator import generate_report
-from modules.caption_burner import burn_captions
+from modules.caption_burner import burn_captions, burn_captions_soft
 from modules.utils import clean_filename, format_timestamp_readable
 
 
@@ -81,8 +85,42 @@ def print_summary(results: dict):
     print()
 
 
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(
+        description="Meeting Video Captioning & Documentation Program"
+    )
+    parser.add_argument(
+        "--no-parallel",
+        action="store_true",
+        help="Run detection, report generation and caption burning one after another "
+             "instead of concurrently"
+    )
+    return parser.parse_args()
+
+
+def run_detection(video_path: str, stop: Optional[threading.Event] = None):
+    """
+    Detect scene changes, then UI interactions (which need the scene list);
+    setting `stop` ends both early
+    """
+    scene_changes = detect_scenes(video_path, stop=stop)
+    if stop is not None and stop.is_set():
+        return scene_changes, []
+    clicks = detect_clicks(video_path, scene_changes, stop=stop)
+    return scene_changes, clicks
+
+
+def run_caption_burn(video_path: str, srt_path: str):
+    """Burn (or mux, with SOFT_SUBTITLES) the SRT captions into the video"""
+    if config.SOFT_SUBTITLES:
+        return burn_captions_soft(video_path, srt_path)
+    return burn_captions(video_path, srt_path)
+
+
 def main():
     """Main processing function"""
+    args = parse_args()
     print_banner()
     
     # Get input from user
@@ -119,67 +157,120 @@ def main():
         print("\n" + "-"*70)
         print("STEP 2: Extracting Audio")
         print("-"*70)
-        audio_path = extract_audio(video_path)
-        
-        if not audio_path:
-            print("Error: Failed to extract audio")
-            sys.exit(1)
-        
-        results['audio_path'] = audio_path
-        print(f"✓ Audio extracted: {Path(audio_path).name}")
-        
-        # Step 3: Transcribe audio
-        print("\n" + "-"*70)
-        print("STEP 3: Transcribing Audio with Whisper")
-        print("-"*70)
-        transcription_result = transcribe_audio(audio_path)
+        audio = None
         
-        if not transcription_result:
-            print("Error: Failed to transcribe audio")
-            sys.exit(1)
-        
-        results['transcription_result'] = transcription_result
-        
-        # Generate SRT file
-        srt_path = generate_srt(transcription_result)
-        if srt_path:
-            results['srt_path'] = srt_path
-        
-        # Step 4: Detect scenes and clicks
-        print("\n" + "-"*70)
-        print("STEP 4: Detecting Scene Changes & UI Interactions")
-        print("-"*70)
-        scene_changes = detect_scenes(video_path)
-        results['scene_changes'] = scene_changes
+        if config.STREAM_AUDIO:
+            audio = extract_audio_stream(video_path)
+            if audio is not None:
+                print(f"✓ Audio decoded in memory: "
+                      f"{format_timestamp_readable(len(audio) / WHISPER_SAMPLE_RATE)}")
         
-        clicks = detect_clicks(video_path, scene_changes)
-        results['clicks'] = clicks
+        if audio is None:
+            audio_path = extract_audio(video_path)
+            
+            if not audio_path:
+                print("Error: Failed to extract audio")
+                sys.exit(1)
+            
+            results['audio_path'] = audio_path
+            audio = audio_path
+            print(f"✓ Audio extracted: {Path(audio_path).name}")
         
-        # Step 5: Generate report
-        print("\n" + "-"*70)
-        print("STEP 5: Generating Meeting Report")
-        print("-"*70)
-        report_path = generate_report(
-            video_path,
-            transcription_result,
-            scene_changes,
-            clicks
-        )
+        # Scene/click detection only needs the video, so overlap it with
+        # transcription (OpenCV and Whisper release the GIL in native code)
+        detection_executor = None
+        detection_future = None
+        detection_stop = threading.Event()
+        if not args.no_parallel:
+            print("Starting scene & UI interaction detection in the background...")
+            detection_executor = ThreadPoolExecutor(max_workers=1)
+            detection_future = detection_executor.submit(run_detection, video_path, detection_stop)
         
-        if report_path:
-            results['report_path'] = report_path
+        try:
+            # Step 3: Transcribe audio
+            print("\n" + "-"*70)
+            print("STEP 3: Transcribing Audio with Whisper")
+            print("-"*70)
+            transcription_result = transcribe_audio(audio)
+            
+            if not transcription_result:
+                print("Error: Failed to transcribe audio")
+                sys.exit(1)
+            
+            results['transcription_result'] = transcription_result
+            
+            # Generate SRT file
+            srt_path = generate_srt(transcription_result)
+            if srt_path:
+                results['srt_path'] = srt_path
+            
+            # Step 4: Detect scenes and clicks
+            print("\n" + "-"*70)
+            print("STEP 4: Detecting Scene Changes & UI Interactions")
+            print("-"*70)
+            if detection_future is not None:
+                print("Waiting for background detection to finish...")
+                scene_changes, clicks = detection_future.result()
+            else:
+                scene_changes, clicks = run_detection(video_path)
+            
+            results['scene_changes'] = scene_changes
+            results['clicks'] = clicks
+        finally:
+            # A failed or interrupted run must not wait for the whole video
+            # to be scanned before the process can exit
+            if detection_executor is not None:
+                detection_stop.set()
+                detection_future.cancel()
+                detection_executor.shutdown(wait=False)
         
-        # Step 6: Burn captions into video
-        print("\n" + "-"*70)
-        print("STEP 6: Burning Captions into Video")
-        print("-"*70)
+        # Steps 5 & 6 only read the video and transcription, so the report
+        # (disk-bound) is written while FFmpeg encodes in a subprocess
+        if not srt_path:
+            print("⚠ Skipping caption burning (SRT file not available)")
         
-        if srt_path:
-            final_video_path = burn_captions(video_path, srt_path)
-            if final_video_path:
-                results['final_video_path'] = final_video_path
+        if not args.no_parallel and srt_path:
+            print("\n" + "-"*70)
+            print("STEPS 5 & 6: Generating Meeting Report & Burning Captions")
+            print("-"*70)
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                futures = {
+                    executor.submit(
+                        generate_report,
+                        video_path,
+                        transcription_result,
+                        scene_changes,
+                        clicks
+                    ): 'report_path',
+                    executor.submit(run_caption_burn, video_path, srt_path): 'final_video_path',
+                }
+                for future in as_completed(futures):
+                    output_path = future.result()
+                    if output_path:
+                        results[futures[future]] = output_path
         else:
-            print("⚠ Skipping caption burning (SRT file not available)")
+            # Step 5: Generate report
+            print("\n" + "-"*70)
+            print("STEP 5: Generating Meeting Report")
+            print("-"*70)
+            report_path = generate_report(
+                video_path,
+                transcription_result,
+                scene_changes,
+                clicks
+            )
+            
+            if report_path:
+                results['report_path'] = report_path
+            
+            # Step 6: Burn captions into video
+            if srt_path:
+                print("\n" + "-"*70)
+                print("STEP 6: Burning Captions into Video")
+                print("-"*70)
+                final_video_path = run_caption_burn(video_path, srt_path)
+                if final_video_path:
+                    results['final_video_path'] = final_video_path
         
         # Print summary
         print_summary(results)
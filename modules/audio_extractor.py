@@ -3,11 +3,17 @@ Audio extraction module using FFmpeg or MoviePy
 """
 
 import os
+import hashlib
+import tempfile
 from pathlib import Path
 from typing import Optional
 import subprocess
+import numpy as np
 import config
-from .utils import ensure_dir
+from .utils import ensure_dir, has_ffmpeg
+
+# Whisper expects 16 kHz mono audio
+WHISPER_SAMPLE_RATE = 16000
 
 
 def extract_audio(video_path: str, output_path: Optional[str] = None) -> Optional[str]:
@@ -70,12 +76,7 @@ def extract_audio_ffmpeg(video_path: str, output_path: str) -> bool:
     """
     try:
         # Check if FFmpeg is available
-        try:
-            subprocess.run(['ffmpeg', '-version'], 
-                         capture_output=True, 
-                         check=True,
-                         timeout=5)
-        except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
+        if not has_ffmpeg():
             return False
         
         # Extract audio using FFmpeg
@@ -158,3 +159,171 @@ def extract_audio_moviepy(video_path: str, output_path: str) -> bool:
         print(f"MoviePy extraction error: {e}")
         return False
 
+
+def get_audio_cache_path(video_path: Path) -> Path:
+    """
+    Get the cache file for a video's decoded audio; the name changes whenever
+    the video file is replaced or modified
+    
+    Args:
+        video_path: Path to video file
+        
+    Returns:
+        Path to the .npy cache file (may not exist yet)
+    """
+    stat = video_path.stat()
+    key = f"{video_path.resolve()}|{stat.st_size}|{stat.st_mtime_ns}"
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+    return config.CACHE_DIR / f"{digest}_pcm16_{WHISPER_SAMPLE_RATE}.npy"
+
+
+def load_cached_audio(cache_path: Path) -> Optional[np.ndarray]:
+    """
+    Load cached 16-bit PCM samples; a cache file that cannot be read (e.g.
+    left truncated by an interrupted run) is deleted
+    
+    Args:
+        cache_path: Path to the .npy cache file
+        
+    Returns:
+        int16 samples or None if there is no usable cache file
+    """
+    try:
+        pcm = np.load(cache_path)
+        if pcm.dtype != np.int16 or pcm.ndim != 1:
+            raise ValueError(f"unexpected {pcm.dtype} array of shape {pcm.shape}")
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Warning: discarding unreadable audio cache {cache_path.name} ({e})")
+        cache_path.unlink(missing_ok=True)
+        return None
+    
+    # Mark as recently used for eviction
+    os.utime(cache_path)
+    return pcm
+
+
+def save_cached_audio(cache_path: Path, pcm: np.ndarray):
+    """
+    Write 16-bit PCM samples to the cache through a temporary file, so the
+    cache file only ever appears complete, then evict old entries
+    
+    Args:
+        cache_path: Path to the .npy cache file
+        pcm: int16 samples
+    """
+    ensure_dir(cache_path.parent)
+    fd, temp_name = tempfile.mkstemp(dir=cache_path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, pcm)
+        os.replace(temp_name, cache_path)
+    except BaseException:
+        os.unlink(temp_name)
+        raise
+    
+    prune_audio_cache(cache_path.parent, config.AUDIO_CACHE_MAX_MB * 1024 * 1024)
+
+
+def prune_audio_cache(cache_dir: Path, max_bytes: int):
+    """
+    Delete the least recently used cached audio files until the cache fits
+    in max_bytes
+    
+    Args:
+        cache_dir: Directory holding the cache files
+        max_bytes: Size limit for all cached audio
+    """
+    entries = []
+    for path in cache_dir.glob("*_pcm16_*.npy"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+
+
+def pcm_to_float(pcm: np.ndarray) -> np.ndarray:
+    """
+    Convert 16-bit PCM samples to float32 in [-1, 1] as Whisper expects
+    """
+    return pcm.astype(np.float32) / 32768.0
+
+
+def extract_audio_stream(video_path: str) -> Optional[np.ndarray]:
+    """
+    Decode audio straight into memory as Whisper-ready samples, skipping the
+    intermediate WAV file
+    
+    Args:
+        video_path: Path to video file
+        
+    Returns:
+        16 kHz mono float32 samples in [-1, 1] or None if error
+    """
+    try:
+        video_path = Path(video_path)
+        
+        if not video_path.exists():
+            print(f"Error: Video file not found - {video_path}")
+            return None
+        
+        cache_path = None
+        if config.CACHE_DECODED_AUDIO:
+            cache_path = get_audio_cache_path(video_path)
+            pcm = load_cached_audio(cache_path)
+            if pcm is not None:
+                print(f"Loading cached audio for: {video_path.name}")
+                return pcm_to_float(pcm)
+        
+        if not has_ffmpeg():
+            print("FFmpeg not available")
+            return None
+        
+        print(f"Decoding audio from: {video_path.name}")
+        
+        cmd = [
+            'ffmpeg',
+            '-nostdin',
+            '-i', str(video_path),
+            '-vn',  # No video
+            '-f', 's16le',  # Raw PCM 16-bit on stdout
+            '-acodec', 'pcm_s16le',
+            '-ar', str(WHISPER_SAMPLE_RATE),
+            '-ac', '1',  # Mono
+            '-'
+        ]
+        
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        stdout, stderr = process.communicate(timeout=300)  # 5 minute timeout
+        
+        if process.returncode != 0 or not stdout:
+            print(f"FFmpeg error: {stderr.decode(errors='replace')[-1200:]}")
+            return None
+        
+        pcm = np.frombuffer(stdout, np.int16)
+        
+        if cache_path is not None:
+            try:
+                save_cached_audio(cache_path, pcm)
+            except OSError as e:
+                print(f"Warning: could not cache decoded audio ({e})")
+        
+        return pcm_to_float(pcm)
+        
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.communicate()
+        print("FFmpeg audio decoding timed out")
+        return None
+    except Exception as e:
+        print(f"Error decoding audio: {e}")
+        return None
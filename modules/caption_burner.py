@@ -3,11 +3,15 @@ Caption burner module for burning SRT subtitles into video using FFmpeg
 """
 
 import os
+import time
+import functools
+import threading
 import subprocess
+from collections import deque
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Tuple
 import config
-from .utils import ensure_dir
+from .utils import ensure_dir, has_ffmpeg, get_video_duration, format_timestamp_readable
 
 
 def burn_captions(
@@ -52,60 +56,36 @@ def burn_captions(
         print(f"Output: {output_path.name}")
         
         # Check if FFmpeg is available
-        try:
-            subprocess.run(['ffmpeg', '-version'], 
-                         capture_output=True, 
-                         check=True,
-                         timeout=5)
-        except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
+        if not has_ffmpeg():
             print("Error: FFmpeg not found. Please install FFmpeg to burn captions.")
             print("Download from: https://ffmpeg.org/download.html")
             return None
         
         # Build FFmpeg command (absolute paths, forward slashes, quoted SRT)
         video_input = video_path.as_posix()
-        srt_input = srt_path.as_posix()
         output_file = output_path.as_posix()
+        vf_filter = build_subtitles_filter(srt_path)
 
-        # Escape filter path for Windows drive colon
-        def _escape_filter_path(p: str) -> str:
-            return p.replace(":", r"\:").replace("'", r"\'")
-
-        escaped_srt = _escape_filter_path(srt_input)
-
-        force_style = (
-            f"FontName=Arial,"
-            f"FontSize={config.CAPTION_FONT_SIZE},"
-            f"PrimaryColour=&H00FFFFFF&,"  # white
-            f"OutlineColour=&H00000000&,"  # black outline
-            f"BorderStyle=1,Outline=2,Shadow=0,Alignment=2"
-        )
-        vf_filter = f"subtitles='{escaped_srt}':force_style='{force_style}'"
-
-        cmd = [
-            "ffmpeg",
-            "-y",  # Overwrite output file
-            "-i", video_input,
-            "-sub_charenc", "UTF-8",
-            "-vf", vf_filter,
-            "-c:v", config.OUTPUT_VIDEO_CODEC,
-            "-c:a", "copy",  # keep original audio as requested
-            "-preset", "medium",
-            "-crf", "23",  # Quality setting (lower = better quality, 18-28 typical range)
-            output_file,
-        ]
+        use_nvenc = config.USE_HW_ENCODER and has_nvenc()
+        cmd = build_burn_command(video_input, vf_filter, output_file, use_nvenc)
+        
+        if use_nvenc:
+            print("Running FFmpeg with NVENC hardware encoding...")
+        else:
+            print("Running FFmpeg (this may take a while)...")
         
-        print("Running FFmpeg (this may take a while)...")
+        duration = get_video_duration(str(video_path))
         
         # Run FFmpeg
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=3600  # 1 hour timeout
-        )
+        returncode, stderr_tail = run_ffmpeg_with_progress(cmd, duration)
         
-        if result.returncode == 0 and output_path.exists():
+        # NVENC can be compiled in without a usable GPU/driver
+        if use_nvenc and returncode != 0:
+            print("⚠ NVENC encoding failed, falling back to libx264...")
+            cmd = build_burn_command(video_input, vf_filter, output_file, use_nvenc=False)
+            returncode, stderr_tail = run_ffmpeg_with_progress(cmd, duration)
+        
+        if returncode == 0 and output_path.exists():
             file_size_mb = os.path.getsize(output_path) / (1024 * 1024)
             print(f"✓ Captions burned successfully!")
             print(f"  Output: {output_path}")
@@ -113,11 +93,9 @@ def burn_captions(
             return str(output_path)
         else:
             print("Error: FFmpeg failed to burn captions")
-            print(f"Return code: {result.returncode}")
-            if result.stdout:
-                print(f"FFmpeg stdout:\n{result.stdout[:800]}")
-            if result.stderr:
-                print(f"FFmpeg stderr:\n{result.stderr[:1200]}")
+            print(f"Return code: {returncode}")
+            if stderr_tail:
+                print(f"FFmpeg stderr (last lines):\n{stderr_tail}")
             return None
             
     except subprocess.TimeoutExpired:
@@ -128,6 +106,282 @@ def burn_captions(
         return None
 
 
+def run_ffmpeg_with_progress(
+    cmd: List[str],
+    duration: Optional[float] = None,
+    timeout: float = 3600
+) -> Tuple[int, str]:
+    """
+    Run an FFmpeg command while reporting progress from its -progress stream
+    
+    Args:
+        cmd: FFmpeg argument list (starting with "ffmpeg")
+        duration: Input duration in seconds, used for percentage/ETA
+        timeout: Maximum run time in seconds
+        
+    Returns:
+        (return code, last ~2 KB of stderr)
+        
+    Raises:
+        subprocess.TimeoutExpired: If FFmpeg runs longer than timeout
+    """
+    cmd = cmd[:1] + ["-progress", "pipe:1", "-nostats"] + cmd[1:]
+    process = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    
+    # Drain stderr on a separate thread so a full pipe can't stall FFmpeg,
+    # keeping only the tail for error reports
+    stderr_tail = deque(maxlen=2048)
+    
+    def _drain_stderr():
+        for line in process.stderr:
+            stderr_tail.extend(line)
+    
+    stderr_thread = threading.Thread(target=_drain_stderr, daemon=True)
+    stderr_thread.start()
+    
+    # The deadline is enforced by a timer rather than the read loop, which
+    # blocks for as long as FFmpeg stays silent
+    timed_out = threading.Event()
+    
+    def _kill_on_timeout():
+        if process.poll() is None:
+            timed_out.set()
+            process.kill()
+    
+    deadline = threading.Timer(timeout, _kill_on_timeout)
+    deadline.daemon = True
+    deadline.start()
+    
+    start_time = time.monotonic()
+    last_report = start_time
+    out_time = 0.0
+    speed = ""
+    
+    try:
+        for line in process.stdout:
+            key, _, value = line.strip().partition("=")
+            
+            # out_time_ms is in microseconds, like out_time_us
+            if key in ("out_time_us", "out_time_ms") and value.isdigit():
+                out_time = int(value) / 1_000_000
+            elif key == "speed":
+                speed = value
+            elif key == "progress":
+                now = time.monotonic()
+                if now - last_report >= 5 or value == "end":
+                    last_report = now
+                    if duration:
+                        percent = min(out_time / duration, 1.0) * 100
+                        elapsed = now - start_time
+                        eta = elapsed * (duration - out_time) / out_time if out_time > 0 else 0
+                        print(f"  Progress: {percent:5.1f}% | speed {speed} | "
+                              f"ETA {format_timestamp_readable(max(eta, 0))}")
+                    else:
+                        print(f"  Processed: {format_timestamp_readable(out_time)} | speed {speed}")
+        
+        process.wait()
+    finally:
+        deadline.cancel()
+        # Never leave FFmpeg running behind an exception or Ctrl-C
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+    
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(cmd, timeout)
+    
+    stderr_thread.join()
+    return process.returncode, "".join(stderr_tail)
+
+
+def burn_captions_soft(
+    video_path: str,
+    srt_path: str,
+    output_path: Optional[str] = None
+) -> Optional[str]:
+    """
+    Add SRT captions as a toggleable subtitle track, copying the audio and
+    video streams without re-encoding
+    
+    Args:
+        video_path: Path to input video file
+        srt_path: Path to SRT subtitle file
+        output_path: Optional output path for final video
+        
+    Returns:
+        Path to final video with embedded subtitles or None if error
+    """
+    try:
+        video_path = Path(video_path).resolve()
+        srt_path = Path(srt_path).resolve()
+        
+        if not video_path.exists():
+            print(f"Error: Video file not found - {video_path}")
+            return None
+        
+        if not srt_path.exists():
+            print(f"Error: SRT file not found - {srt_path}")
+            return None
+        
+        if output_path is None:
+            ensure_dir(config.FINAL_VIDEOS_DIR)
+            output_path = (config.FINAL_VIDEOS_DIR / f"{video_path.stem}_subtitled.mp4").resolve()
+        else:
+            output_path = Path(output_path).resolve()
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        if not has_ffmpeg():
+            print("Error: FFmpeg not found. Please install FFmpeg to add captions.")
+            print("Download from: https://ffmpeg.org/download.html")
+            return None
+        
+        print(f"Adding subtitle track to video...")
+        print(f"Input: {video_path.name}")
+        print(f"SRT: {srt_path.name}")
+        print(f"Output: {output_path.name}")
+        
+        cmd = [
+            "ffmpeg",
+            "-y",  # Overwrite output file
+            "-i", video_path.as_posix(),
+            "-sub_charenc", "UTF-8",
+            "-i", srt_path.as_posix(),
+            "-map", "0:v",
+            "-map", "0:a?",
+            "-map", "1:0",
+            "-c", "copy",  # no re-encode
+            "-c:s", "mov_text",
+            output_path.as_posix(),
+        ]
+        
+        returncode, stderr_tail = run_ffmpeg_with_progress(cmd, get_video_duration(str(video_path)))
+        
+        if returncode == 0 and output_path.exists():
+            file_size_mb = os.path.getsize(output_path) / (1024 * 1024)
+            print(f"✓ Subtitle track added successfully!")
+            print(f"  Output: {output_path}")
+            print(f"  Size: {file_size_mb:.2f} MB")
+            return str(output_path)
+        
+        print("Error: FFmpeg failed to add subtitle track")
+        print(f"Return code: {returncode}")
+        if stderr_tail:
+            print(f"FFmpeg stderr (last lines):\n{stderr_tail}")
+        return None
+        
+    except subprocess.TimeoutExpired:
+        print("Error: FFmpeg operation timed out (exceeded 1 hour)")
+        return None
+    except Exception as e:
+        print(f"Error adding subtitle track: {e}")
+        return None
+
+
+@functools.lru_cache(maxsize=1)
+def has_nvenc() -> bool:
+    """
+    Check whether the installed FFmpeg was built with the h264_nvenc encoder
+    
+    Returns:
+        True if h264_nvenc is listed by FFmpeg, False otherwise
+    """
+    if not has_ffmpeg():
+        return False
+    
+    try:
+        result = subprocess.run(
+            ['ffmpeg', '-hide_banner', '-encoders'],
+            capture_output=True,
+            text=True,
+            timeout=10
+        )
+        return 'h264_nvenc' in result.stdout
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return False
+
+
+def build_burn_command(
+    video_input: str,
+    vf_filter: str,
+    output_file: str,
+    use_nvenc: bool
+) -> List[str]:
+    """
+    Build the FFmpeg command for burning captions
+    
+    Args:
+        video_input: Input video path (forward slashes)
+        vf_filter: Subtitles filter from build_subtitles_filter()
+        output_file: Output video path (forward slashes)
+        use_nvenc: Decode and encode on the GPU with NVDEC/NVENC
+        
+    Returns:
+        FFmpeg argument list
+    """
+    if use_nvenc:
+        # Frames stay on the GPU except for the libass overlay step
+        return [
+            "ffmpeg",
+            "-y",  # Overwrite output file
+            "-hwaccel", "cuda",
+            "-hwaccel_output_format", "cuda",
+            "-i", video_input,
+            "-sub_charenc", "UTF-8",
+            "-vf", f"hwdownload,format=nv12,{vf_filter},hwupload_cuda",
+            "-c:v", "h264_nvenc",
+            "-c:a", "copy",  # keep original audio as requested
+            "-preset", "p5",
+            "-rc", "vbr",
+            "-cq", "23",  # Constant quality target, comparable to CRF 23
+            "-b:v", "0",
+            output_file,
+        ]
+    
+    return [
+        "ffmpeg",
+        "-y",  # Overwrite output file
+        "-i", video_input,
+        "-sub_charenc", "UTF-8",
+        "-vf", vf_filter,
+        "-c:v", config.OUTPUT_VIDEO_CODEC,
+        "-c:a", "copy",  # keep original audio as requested
+        "-preset", config.FFMPEG_PRESET,
+        "-crf", "23",  # Quality setting (lower = better quality, 18-28 typical range)
+        output_file,
+    ]
+
+
+def build_subtitles_filter(srt_path: Path) -> str:
+    """
+    Build the FFmpeg subtitles filter string for an SRT file
+    
+    Args:
+        srt_path: Absolute path to SRT subtitle file
+        
+    Returns:
+        Value for FFmpeg's -vf option
+    """
+    # Escape filter path for Windows drive colon
+    def _escape_filter_path(p: str) -> str:
+        return p.replace(":", r"\:").replace("'", r"\'")
+
+    escaped_srt = _escape_filter_path(srt_path.as_posix())
+
+    force_style = (
+        f"FontName=Arial,"
+        f"FontSize={config.CAPTION_FONT_SIZE},"
+        f"PrimaryColour=&H00FFFFFF&,"  # white
+        f"OutlineColour=&H00000000&,"  # black outline
+        f"BorderStyle=1,Outline=2,Shadow=0,Alignment=2"
+    )
+    return f"subtitles='{escaped_srt}':force_style='{force_style}'"
+
+
 def create_caption_style_config() -> Optional[str]:
     """
     Create a temporary ASS style file for advanced caption styling
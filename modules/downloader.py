@@ -3,12 +3,14 @@ Video downloader module for handling YouTube, cloud storage, and local files
 """
 
 import os
+import sys
 import shutil
+import subprocess
 from pathlib import Path
 from typing import Optional
 import yt_dlp
 import config
-from .utils import is_valid_url, is_youtube_url, is_cloud_storage_url, clean_filename
+from .utils import classify_url, clean_filename
 
 
 def download_video(source: str, output_dir: Optional[Path] = None) -> Optional[str]:
@@ -33,16 +35,17 @@ def download_video(source: str, output_dir: Optional[Path] = None) -> Optional[s
         return handle_local_file(source, output_dir)
     
     # Check if source is a URL
-    if not is_valid_url(source):
+    url_class = classify_url(source)
+    if not url_class.is_valid:
         print(f"Error: Invalid source - {source}")
         return None
     
     # Handle YouTube URLs
-    if is_youtube_url(source):
+    if url_class.is_youtube:
         return download_youtube_video(source, output_dir)
     
     # Handle cloud storage URLs
-    if is_cloud_storage_url(source):
+    if url_class.is_cloud:
         return download_cloud_video(source, output_dir)
     
     # Try generic download
@@ -72,13 +75,20 @@ def handle_local_file(file_path: str, output_dir: Path) -> Optional[str]:
         if file_path.parent == output_dir:
             return str(file_path)
         
-        # Copy file to output directory
+        # A link can't span filesystems, and a full copy buys nothing over
+        # reading the original in place
+        if (file_path.stat().st_dev != output_dir.resolve().stat().st_dev
+                and os.access(file_path, os.R_OK)):
+            print(f"Using local file in place: {file_path}")
+            return str(file_path)
+        
+        # Link (or copy) file into output directory
         filename = clean_filename(file_path.name)
         dest_path = output_dir / filename
         
-        print(f"Copying local file: {file_path.name}")
-        shutil.copy2(file_path, dest_path)
-        print(f"File copied to: {dest_path}")
+        print(f"Linking local file: {file_path.name}")
+        method = link_or_copy(file_path, dest_path)
+        print(f"File {method} to: {dest_path}")
         
         return str(dest_path)
     except Exception as e:
@@ -86,6 +96,61 @@ def handle_local_file(file_path: str, output_dir: Path) -> Optional[str]:
         return None
 
 
+def link_or_copy(src: Path, dest: Path) -> str:
+    """
+    Place src at dest as cheaply as possible: hard link, then reflink
+    (copy-on-write clone on btrfs/xfs), then a regular copy
+    
+    Args:
+        src: Source file
+        dest: Destination path (replaced if it exists)
+        
+    Returns:
+        How the file was placed ("linked" or "copied")
+    """
+    if dest.exists():
+        if dest.samefile(src):
+            return "linked"
+        dest.unlink()
+    
+    try:
+        os.link(src, dest)
+        return "linked"
+    except OSError:
+        pass
+    
+    if sys.platform.startswith("linux"):
+        result = subprocess.run(
+            ["cp", "--reflink=auto", "--preserve=timestamps", str(src), str(dest)],
+            capture_output=True
+        )
+        if result.returncode == 0:
+            return "copied"
+    
+    shutil.copy2(src, dest)
+    return "copied"
+
+
+def get_downloaded_path(ydl, info: dict) -> Path:
+    """
+    Get the final path of a file written by yt-dlp
+    
+    Post-processors (e.g. merging video and audio) can change the extension,
+    so the path recorded in 'requested_downloads' is preferred over the
+    template-based name from prepare_filename.
+    
+    Args:
+        ydl: YoutubeDL instance that performed the download
+        info: Info dict returned by extract_info(download=True)
+        
+    Returns:
+        Path to the downloaded file
+    """
+    requested = info.get('requested_downloads') or [{}]
+    filepath = requested[0].get('filepath') or ydl.prepare_filename(info)
+    return Path(filepath)
+
+
 def download_youtube_video(url: str, output_dir: Path) -> Optional[str]:
     """
     Download video from YouTube using yt-dlp
@@ -110,31 +175,18 @@ def download_youtube_video(url: str, output_dir: Path) -> Optional[str]:
         }
         
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            # Get video info
-            info = ydl.extract_info(url, download=False)
-            title = clean_filename(info.get('title', 'video'))
-            
-            # Download video
-            ydl.download([url])
+            # Fetch metadata and download in one extraction pass
+            info = ydl.extract_info(url, download=True)
+            video_path = get_downloaded_path(ydl, info)
             
-            # Find downloaded file
-            downloaded_files = list(output_dir.glob(f"{title}.*"))
-            if downloaded_files:
-                video_path = downloaded_files[0]
-                print(f"YouTube video downloaded: {video_path}")
-                return str(video_path)
-            else:
-                # Try to find any new video file
-                video_extensions = ['.mp4', '.webm', '.mkv', '.flv']
-                for ext in video_extensions:
-                    files = list(output_dir.glob(f"*{ext}"))
-                    if files:
-                        print(f"YouTube video downloaded: {files[0]}")
-                        return str(files[0])
-                
+            if not video_path.exists():
                 print("Error: Could not find downloaded video file")
                 return None
-                
+            
+            video_path = video_path.resolve()
+            print(f"YouTube video downloaded: {video_path}")
+            return str(video_path)
+            
     except Exception as e:
         print(f"Error downloading YouTube video: {e}")
         print("Make sure the URL is valid and the video is accessible")
@@ -164,18 +216,16 @@ def download_cloud_video(url: str, output_dir: Path) -> Optional[str]:
         }
         
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([url])
+            info = ydl.extract_info(url, download=True)
+            video_path = get_downloaded_path(ydl, info)
             
-            # Find downloaded file
-            video_extensions = ['.mp4', '.mov', '.avi', '.mkv', '.webm']
-            for ext in video_extensions:
-                files = list(output_dir.glob(f"*{ext}"))
-                if files:
-                    print(f"Cloud video downloaded: {files[0]}")
-                    return str(files[0])
+            if not video_path.exists():
+                print("Error: Could not find downloaded video file")
+                return None
             
-            print("Error: Could not find downloaded video file")
-            return None
+            video_path = video_path.resolve()
+            print(f"Cloud video downloaded: {video_path}")
+            return str(video_path)
             
     except Exception as e:
         print(f"Error downloading cloud video: {e}")
@@ -206,18 +256,16 @@ def download_generic_video(url: str, output_dir: Path) -> Optional[str]:
         }
         
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([url])
+            info = ydl.extract_info(url, download=True)
+            video_path = get_downloaded_path(ydl, info)
             
-            # Find downloaded file
-            video_extensions = ['.mp4', '.mov', '.avi', '.mkv', '.webm', '.flv']
-            for ext in video_extensions:
-                files = list(output_dir.glob(f"*{ext}"))
-                if files:
-                    print(f"Video downloaded: {files[0]}")
-                    return str(files[0])
+            if not video_path.exists():
+                print("Error: Could not find downloaded video file")
+                return None
             
-            print("Error: Could not find downloaded video file")
-            return None
+            video_path = video_path.resolve()
+            print(f"Video downloaded: {video_path}")
+            return str(video_path)
             
     except Exception as e:
         print(f"Error downloading video: {e}")
@@ -2,12 +2,33 @@
 Report generator module for creating PDF/DOCX reports
 """
 
+import io
+import hashlib
+import threading
+import zipfile
+from copy import deepcopy
 from pathlib import Path
 from typing import List, Dict, Optional
 from datetime import datetime
+from xml.sax.saxutils import escape
 import config
 from .utils import ensure_dir, format_timestamp_readable, get_file_size_mb
 
+# Serialized DOCX holding the fixed head of every report (default styles and
+# title), built on first use; see new_report_document()
+_DOCX_SKELETON = None
+_DOCX_SKELETON_LOCK = threading.Lock()
+
+# Transcript segments per PDF paragraph (about half a page)
+PDF_SEGMENTS_PER_PARAGRAPH = 25
+
+# A paragraph that spans pages is re-wrapped from scratch at every page
+# break, so long text is split at sentence ends into blocks of about this size
+PDF_MAX_PARAGRAPH_CHARS = 2000
+
+# DOCX parts that are already entropy-coded and gain nothing from DEFLATE
+DOCX_STORED_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
 
 def generate_report(
     video_path: str,
@@ -60,6 +81,161 @@ def generate_report(
         return None
 
 
+def get_report_image(frame_path: Path) -> Path:
+    """
+    Get a copy of a scene frame downscaled for embedding in a report
+    
+    Frames are stored at capture resolution but shown 5 inches wide, so the
+    report embeds a REPORT_IMAGE_WIDTH px JPEG instead. Thumbnails are named
+    after the source path, size and mtime and reused while those match.
+    
+    Args:
+        frame_path: Path to the full-size frame
+        
+    Returns:
+        Path to the thumbnail, or frame_path if it could not be created
+    """
+    try:
+        from PIL import Image as PILImage
+        
+        stat = frame_path.stat()
+        key = f"{frame_path.resolve()}|{stat.st_size}|{stat.st_mtime_ns}|{config.REPORT_IMAGE_WIDTH}"
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        thumb_dir = ensure_dir(config.FRAMES_DIR / 'report_thumbs')
+        thumb_path = thumb_dir / f"{frame_path.stem}_{digest}.jpg"
+        
+        if not thumb_path.exists():
+            with PILImage.open(frame_path) as img:
+                img.thumbnail((config.REPORT_IMAGE_WIDTH, config.REPORT_IMAGE_WIDTH), PILImage.LANCZOS)
+                img.convert('RGB').save(thumb_path, 'JPEG', quality=config.REPORT_IMAGE_QUALITY)
+        
+        return thumb_path
+    except Exception as e:
+        print(f"Warning: Could not downscale {frame_path.name} for the report: {e}")
+        return frame_path
+
+
+def add_docx_table(doc, rows: List[List[str]], style: str):
+    """
+    Add a table to a DOCX document, building the row XML directly
+    
+    Setting cell.text through python-docx rebuilds each cell's paragraph
+    through several wrapper layers, which gets slow for long tables; here
+    every row is created with plain lxml SubElement calls in one pass.
+    
+    Args:
+        doc: python-docx Document
+        rows: Table rows as lists of preformatted strings
+        style: Table style name
+        
+    Returns:
+        The added python-docx Table
+    """
+    from lxml import etree
+    from docx.oxml.ns import qn
+    
+    table = doc.add_table(rows=1, cols=len(rows[0]))
+    table.style = style
+    tbl = table._tbl
+    
+    # python-docx sizes the cells of the first row; reuse those properties
+    template_row = tbl.tr_lst[0]
+    cell_properties = [tc.tcPr for tc in template_row.tc_lst]
+    tbl.remove(template_row)
+    
+    tag_tr, tag_tc, tag_p, tag_r, tag_t = qn('w:tr'), qn('w:tc'), qn('w:p'), qn('w:r'), qn('w:t')
+    space = qn('xml:space')
+    
+    for values in rows:
+        tr = etree.SubElement(tbl, tag_tr)
+        for tc_pr, value in zip(cell_properties, values):
+            tc = etree.SubElement(tr, tag_tc)
+            if tc_pr is not None:
+                tc.append(deepcopy(tc_pr))
+            run = etree.SubElement(etree.SubElement(tc, tag_p), tag_r)
+            text = etree.SubElement(run, tag_t)
+            text.set(space, 'preserve')
+            text.text = value
+    
+    return table
+
+
+def split_text_blocks(text: str, max_chars: int) -> List[str]:
+    """
+    Split text into blocks of at most about max_chars characters, breaking
+    after a sentence end where possible
+    
+    Args:
+        text: Text to split
+        max_chars: Target block length
+        
+    Returns:
+        List of text blocks
+    """
+    blocks = []
+    while len(text) > max_chars:
+        cut = text.rfind('. ', 0, max_chars)
+        if cut <= 0:
+            cut = text.rfind(' ', 0, max_chars)
+        if cut <= 0:
+            cut = max_chars - 1
+        blocks.append(text[:cut + 1].strip())
+        text = text[cut + 1:]
+    if text.strip():
+        blocks.append(text.strip())
+    return blocks
+
+
+def new_report_document():
+    """
+    Start a DOCX report from the cached skeleton instead of building the
+    default template and title from scratch on every run
+    
+    Returns:
+        python-docx Document containing the report title
+    """
+    global _DOCX_SKELETON
+    from docx import Document
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    
+    with _DOCX_SKELETON_LOCK:
+        if _DOCX_SKELETON is None:
+            doc = Document()
+            
+            # Title
+            title = doc.add_heading('Meeting Video Report', 0)
+            title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+            
+            buffer = io.BytesIO()
+            doc.save(buffer)
+            _DOCX_SKELETON = buffer.getvalue()
+    
+    return Document(io.BytesIO(_DOCX_SKELETON))
+
+
+def save_docx(doc, output_path: Path):
+    """
+    Save a DOCX document, storing embedded images uncompressed and deflating
+    the XML parts at the fastest level instead of python-docx's level 6
+    
+    Args:
+        doc: python-docx Document to save
+        output_path: Destination file path
+    """
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    buffer.seek(0)
+    
+    with zipfile.ZipFile(buffer) as source, open(output_path, 'wb', buffering=1024 * 1024) as out:
+        with zipfile.ZipFile(out, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=1) as target:
+            for info in source.infolist():
+                if info.filename.lower().endswith(DOCX_STORED_EXTENSIONS):
+                    compress_type = zipfile.ZIP_STORED
+                else:
+                    compress_type = zipfile.ZIP_DEFLATED
+                target.writestr(info.filename, source.read(info), compress_type=compress_type)
+
+
 def generate_docx_report(
     video_path: Path,
     transcription_result: Dict,
@@ -81,31 +257,26 @@ def generate_docx_report(
         Path to generated report or None if error
     """
     try:
-        from docx import Document
         from docx.shared import Inches, Pt
-        from docx.enum.text import WD_ALIGN_PARAGRAPH
         
-        doc = Document()
+        segments = transcription_result.get('segments') or []
+        total_duration = segments[-1].get('end', 0) if segments else 0.0
+        duration_str = format_timestamp_readable(total_duration)
         
-        # Title
-        title = doc.add_heading('Meeting Video Report', 0)
-        title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        # Title comes from the skeleton
+        doc = new_report_document()
         
         # Video Information
         doc.add_heading('Video Information', level=1)
-        info_table = doc.add_table(rows=4, cols=2)
-        info_table.style = 'Light Grid Accent 1'
         
         info_data = [
             ('Video File', video_path.name),
             ('File Size', f"{get_file_size_mb(str(video_path)):.2f} MB"),
             ('Report Generated', datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
-            ('Total Duration', format_timestamp_readable(transcription_result.get('segments', [{}])[-1].get('end', 0) if transcription_result.get('segments') else 0))
+            ('Total Duration', duration_str)
         ]
         
-        for i, (label, value) in enumerate(info_data):
-            info_table.rows[i].cells[0].text = label
-            info_table.rows[i].cells[1].text = str(value)
+        add_docx_table(doc, [[label, str(value)] for label, value in info_data], 'Light Grid Accent 1')
         
         # Scene Changes
         if config.INCLUDE_SCREENSHOTS and scene_changes:
@@ -119,7 +290,7 @@ def generate_docx_report(
                 frame_path = Path(scene['frame_path'])
                 if frame_path.exists():
                     try:
-                        doc.add_picture(str(frame_path), width=Inches(5))
+                        doc.add_picture(str(get_report_image(frame_path)), width=Inches(5))
                     except Exception as e:
                         doc.add_paragraph(f"[Screenshot unavailable: {e}]")
                 
@@ -138,11 +309,10 @@ def generate_docx_report(
         
         # Segmented Transcript
         doc.add_heading('Segmented Transcript with Timestamps', level=1)
-        segments = transcription_result.get('segments', [])
+        segment_timestamps = [format_timestamp_readable(segment['start']) for segment in segments]
         
         if segments:
-            for segment in segments:
-                timestamp = format_timestamp_readable(segment['start'])
+            for segment, timestamp in zip(segments, segment_timestamps):
                 text = segment['text'].strip()
                 doc.add_paragraph(f"[{timestamp}] {text}")
         else:
@@ -153,27 +323,22 @@ def generate_docx_report(
             doc.add_heading('UI Interactions (Clicks & Movements)', level=1)
             doc.add_paragraph(f'Total interactions detected: {len(clicks)}')
             
-            click_table = doc.add_table(rows=len(clicks) + 1, cols=2)
-            click_table.style = 'Light Grid Accent 1'
-            
-            # Header
-            click_table.rows[0].cells[0].text = 'Timestamp'
-            click_table.rows[0].cells[1].text = 'Intensity'
-            
-            # Data
-            for i, click in enumerate(clicks, 1):
-                click_table.rows[i].cells[0].text = click['timestamp_readable']
-                click_table.rows[i].cells[1].text = f"{click['intensity']:.2f}"
+            # Header, then one row per interaction
+            click_rows = [['Timestamp', 'Intensity']]
+            click_rows.extend(
+                [click['timestamp_readable'], f"{click['intensity']:.2f}"] for click in clicks
+            )
+            add_docx_table(doc, click_rows, 'Light Grid Accent 1')
         
         # Summary
         doc.add_heading('Summary', level=1)
         summary_para = doc.add_paragraph()
         summary_para.add_run(f"This meeting video contains {len(scene_changes)} major scene changes and "
                            f"{len(clicks)} UI interactions. The total duration is approximately "
-                           f"{format_timestamp_readable(segments[-1].get('end', 0) if segments else 0)}.")
+                           f"{duration_str}.")
         
         # Save document
-        doc.save(str(output_path))
+        save_docx(doc, output_path)
         print(f"DOCX report generated: {output_path}")
         return str(output_path)
         
@@ -213,14 +378,21 @@ def generate_pdf_report(
         from reportlab.lib import colors
         from reportlab.lib.enums import TA_CENTER, TA_LEFT
         
+        segments = transcription_result.get('segments') or []
+        total_duration = segments[-1].get('end', 0) if segments else 0.0
+        duration_str = format_timestamp_readable(total_duration)
+        
         doc = SimpleDocTemplate(str(output_path), pagesize=letter)
         story = []
         styles = getSampleStyleSheet()
+        normal = styles['Normal']
+        heading1 = styles['Heading1']
+        heading2 = styles['Heading2']
         
         # Title
         title_style = ParagraphStyle(
             'CustomTitle',
-            parent=styles['Heading1'],
+            parent=heading1,
             fontSize=24,
             textColor=colors.HexColor('#1a1a1a'),
             spaceAfter=30,
@@ -230,12 +402,12 @@ def generate_pdf_report(
         story.append(Spacer(1, 0.3*inch))
         
         # Video Information
-        story.append(Paragraph('Video Information', styles['Heading1']))
+        story.append(Paragraph('Video Information', heading1))
         info_data = [
             ['Video File', video_path.name],
             ['File Size', f"{get_file_size_mb(str(video_path)):.2f} MB"],
             ['Report Generated', datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
-            ['Total Duration', format_timestamp_readable(transcription_result.get('segments', [{}])[-1].get('end', 0) if transcription_result.get('segments') else 0)]
+            ['Total Duration', duration_str]
         ]
         
         info_table = Table(info_data, colWidths=[2*inch, 4*inch])
@@ -254,54 +426,67 @@ def generate_pdf_report(
         
         # Scene Changes
         if config.INCLUDE_SCREENSHOTS and scene_changes:
-            story.append(Paragraph('Scene Changes & Screenshots', styles['Heading1']))
-            story.append(Paragraph(f'Total scene changes detected: {len(scene_changes)}', styles['Normal']))
+            story.append(Paragraph('Scene Changes & Screenshots', heading1))
+            story.append(Paragraph(f'Total scene changes detected: {len(scene_changes)}', normal))
             story.append(Spacer(1, 0.2*inch))
             
             for scene in scene_changes:
-                story.append(Paragraph(f"Scene {scene['index'] + 1} - {scene['timestamp_readable']}", styles['Heading2']))
+                story.append(Paragraph(f"Scene {scene['index'] + 1} - {scene['timestamp_readable']}", heading2))
                 
                 frame_path = Path(scene['frame_path'])
                 if frame_path.exists():
                     try:
-                        img = Image(str(frame_path), width=5*inch, height=3*inch)
+                        # JPEG paths are embedded as-is (only the header is read,
+                        # no decode); 'proportional' fits the frame into 5x3.75
+                        # inches without distorting its aspect ratio
+                        img = Image(
+                            str(get_report_image(frame_path)),
+                            width=5*inch,
+                            height=3.75*inch,
+                            kind='proportional'
+                        )
                         story.append(img)
                     except Exception as e:
-                        story.append(Paragraph(f"[Screenshot unavailable: {e}]", styles['Normal']))
+                        story.append(Paragraph(f"[Screenshot unavailable: {e}]", normal))
                 
-                story.append(Paragraph(f"Timestamp: {scene['timestamp_readable']}", styles['Normal']))
-                story.append(Paragraph(f"Similarity Score: {scene['similarity']:.3f}", styles['Normal']))
+                story.append(Paragraph(f"Timestamp: {scene['timestamp_readable']}", normal))
+                story.append(Paragraph(f"Similarity Score: {scene['similarity']:.3f}", normal))
                 story.append(Spacer(1, 0.2*inch))
         
         # Transcript
         if config.INCLUDE_TRANSCRIPT:
             story.append(PageBreak())
-            story.append(Paragraph('Full Transcript', styles['Heading1']))
+            story.append(Paragraph('Full Transcript', heading1))
             full_text = transcription_result.get('text', '').strip()
             if full_text:
-                story.append(Paragraph(full_text, styles['Normal']))
+                for block in split_text_blocks(full_text, PDF_MAX_PARAGRAPH_CHARS):
+                    story.append(Paragraph(escape(block), normal))
             else:
-                story.append(Paragraph("No transcript available.", styles['Normal']))
+                story.append(Paragraph("No transcript available.", normal))
         
         # Segmented Transcript
         story.append(PageBreak())
-        story.append(Paragraph('Segmented Transcript with Timestamps', styles['Heading1']))
-        segments = transcription_result.get('segments', [])
+        story.append(Paragraph('Segmented Transcript with Timestamps', heading1))
+        segment_timestamps = [format_timestamp_readable(segment['start']) for segment in segments]
         
         if segments:
-            for segment in segments:
-                timestamp = format_timestamp_readable(segment['start'])
-                text = segment['text'].strip()
-                story.append(Paragraph(f"[{timestamp}] {text}", styles['Normal']))
+            # Segment text is escaped so stray '<' or '&' can't break the markup
+            lines = [
+                f"[{timestamp}] {escape(segment['text'].strip())}"
+                for segment, timestamp in zip(segments, segment_timestamps)
+            ]
+            for start in range(0, len(lines), PDF_SEGMENTS_PER_PARAGRAPH):
+                chunk = lines[start:start + PDF_SEGMENTS_PER_PARAGRAPH]
+                story.append(Paragraph('<br/>'.join(chunk), normal))
                 story.append(Spacer(1, 0.1*inch))
         else:
-            story.append(Paragraph("No segments available.", styles['Normal']))
+            story.append(Paragraph("No segments available.", normal))
         
         # UI Interactions
         if config.INCLUDE_CLICK_LOG and clicks:
             story.append(PageBreak())
-            story.append(Paragraph('UI Interactions (Clicks & Movements)', styles['Heading1']))
-            story.append(Paragraph(f'Total interactions detected: {len(clicks)}', styles['Normal']))
+            story.append(Paragraph('UI Interactions (Clicks & Movements)', heading1))
+            story.append(Paragraph(f'Total interactions detected: {len(clicks)}', normal))
             story.append(Spacer(1, 0.2*inch))
             
             click_data = [['Timestamp', 'Intensity']]
@@ -323,11 +508,11 @@ def generate_pdf_report(
         
         # Summary
         story.append(PageBreak())
-        story.append(Paragraph('Summary', styles['Heading1']))
+        story.append(Paragraph('Summary', heading1))
         summary_text = (f"This meeting video contains {len(scene_changes)} major scene changes and "
                        f"{len(clicks)} UI interactions. The total duration is approximately "
-                       f"{format_timestamp_readable(segments[-1].get('end', 0) if segments else 0)}.")
-        story.append(Paragraph(summary_text, styles['Normal']))
+                       f"{duration_str}.")
+        story.append(Paragraph(summary_text, normal))
         
         # Build PDF
         doc.build(story)
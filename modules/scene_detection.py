@@ -1,23 +1,714 @@
 """
-Scene detection module using OpenCV and SSIM
+Scene detection module using OpenCV (regional histograms or SSIM)
 """
 
+import bisect
+import queue
+import threading
 import cv2
 import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
-from skimage.metrics import structural_similarity as ssim
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
 import config
 from .utils import format_timestamp_readable, ensure_dir
 
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
 
-def detect_scenes(video_path: str, output_dir: Optional[Path] = None) -> List[Dict]:
+try:
+    from decord import VideoReader, cpu
+except ImportError:
+    VideoReader = None
+
+# Regional histogram settings: frames are split into a GRID x GRID layout
+HISTOGRAM_GRID = 4
+HISTOGRAM_BINS = 32
+
+# Gaps (in frames) up to this size are decoded forward with grab() instead of
+# seeking: a seek restarts decoding at the previous keyframe, which is usually
+# further back than this for screen recordings and streamed uploads
+SEEK_MIN_GAP = 120
+
+# Saved frames are JPEG-encoded off the detection thread (cv2.imwrite
+# releases the GIL); see save_frame_async()
+_ENCODE_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="frame-encode")
+
+# SSIM stabilizing constants for 8-bit input: (0.01 * 255)^2, (0.03 * 255)^2
+SSIM_C1 = 6.5025
+SSIM_C2 = 58.5225
+
+
+class CudaSSIM:
+    """
+    SSIM on the GPU with device buffers allocated once and reused for every
+    frame pair (allocations on CUDA are far more expensive than the math)
+    """
+    
+    def __init__(self):
+        self.gauss = cv2.cuda.createGaussianFilter(cv2.CV_32F, cv2.CV_32F, (11, 11), 1.5)
+        self.gpu_a = cv2.cuda_GpuMat()
+        self.gpu_b = cv2.cuda_GpuMat()
+        # Scratch buffers, sized on first use
+        self.t1 = cv2.cuda_GpuMat()
+        self.t2 = cv2.cuda_GpuMat()
+        self.t3 = cv2.cuda_GpuMat()
+        self.i1_2 = cv2.cuda_GpuMat()
+        self.i2_2 = cv2.cuda_GpuMat()
+        self.i1_i2 = cv2.cuda_GpuMat()
+        self.mu1 = cv2.cuda_GpuMat()
+        self.mu2 = cv2.cuda_GpuMat()
+        self.mu1_2 = cv2.cuda_GpuMat()
+        self.mu2_2 = cv2.cuda_GpuMat()
+        self.mu1_mu2 = cv2.cuda_GpuMat()
+        self.sigma1_2 = cv2.cuda_GpuMat()
+        self.sigma2_2 = cv2.cuda_GpuMat()
+        self.sigma12 = cv2.cuda_GpuMat()
+        self.ssim_map = cv2.cuda_GpuMat()
+    
+    def __call__(self, frame_a: np.ndarray, frame_b: np.ndarray) -> float:
+        """Mean SSIM of two equally sized grayscale uint8 frames"""
+        self.gpu_a.upload(frame_a)
+        self.gpu_b.upload(frame_b)
+        self.gpu_a.convertTo(cv2.CV_32F, self.t1)
+        self.gpu_b.convertTo(cv2.CV_32F, self.t2)
+        
+        cv2.cuda.multiply(self.t1, self.t1, self.i1_2)
+        cv2.cuda.multiply(self.t2, self.t2, self.i2_2)
+        cv2.cuda.multiply(self.t1, self.t2, self.i1_i2)
+        
+        self.gauss.apply(self.t1, self.mu1)
+        self.gauss.apply(self.t2, self.mu2)
+        cv2.cuda.multiply(self.mu1, self.mu1, self.mu1_2)
+        cv2.cuda.multiply(self.mu2, self.mu2, self.mu2_2)
+        cv2.cuda.multiply(self.mu1, self.mu2, self.mu1_mu2)
+        
+        self.gauss.apply(self.i1_2, self.sigma1_2)
+        cv2.cuda.subtract(self.sigma1_2, self.mu1_2, self.sigma1_2)
+        self.gauss.apply(self.i2_2, self.sigma2_2)
+        cv2.cuda.subtract(self.sigma2_2, self.mu2_2, self.sigma2_2)
+        self.gauss.apply(self.i1_i2, self.sigma12)
+        cv2.cuda.subtract(self.sigma12, self.mu1_mu2, self.sigma12)
+        
+        # Numerator: (2*mu1*mu2 + C1) * (2*sigma12 + C2)
+        cv2.cuda.addWeighted(self.mu1_mu2, 2.0, self.mu1_mu2, 0.0, SSIM_C1, self.t3)
+        cv2.cuda.addWeighted(self.sigma12, 2.0, self.sigma12, 0.0, SSIM_C2, self.t1)
+        cv2.cuda.multiply(self.t3, self.t1, self.t3)
+        
+        # Denominator: (mu1^2 + mu2^2 + C1) * (sigma1^2 + sigma2^2 + C2)
+        cv2.cuda.addWeighted(self.mu1_2, 1.0, self.mu2_2, 1.0, SSIM_C1, self.t1)
+        cv2.cuda.addWeighted(self.sigma1_2, 1.0, self.sigma2_2, 1.0, SSIM_C2, self.t2)
+        cv2.cuda.multiply(self.t1, self.t2, self.t1)
+        
+        cv2.cuda.divide(self.t3, self.t1, self.ssim_map)
+        height, width = frame_a.shape
+        return cv2.cuda.sum(self.ssim_map)[0] / (height * width)
+
+
+def fast_ssim(frame_a: np.ndarray, frame_b: np.ndarray) -> float:
+    """
+    Mean SSIM of two equally sized grayscale uint8 frames, computed with
+    OpenCV's separable Gaussian blur (11x11, sigma 1.5) on float32 arrays
+    
+    Args:
+        frame_a: First grayscale frame
+        frame_b: Second grayscale frame
+        
+    Returns:
+        Mean SSIM (1 = identical)
+    """
+    a = frame_a.astype(np.float32)
+    b = frame_b.astype(np.float32)
+    
+    mu_a = cv2.GaussianBlur(a, (11, 11), 1.5)
+    mu_b = cv2.GaussianBlur(b, (11, 11), 1.5)
+    mu_a_sq = mu_a * mu_a
+    mu_b_sq = mu_b * mu_b
+    mu_ab = mu_a * mu_b
+    
+    sigma_a_sq = cv2.GaussianBlur(a * a, (11, 11), 1.5) - mu_a_sq
+    sigma_b_sq = cv2.GaussianBlur(b * b, (11, 11), 1.5) - mu_b_sq
+    sigma_ab = cv2.GaussianBlur(a * b, (11, 11), 1.5) - mu_ab
+    
+    numerator = (2 * mu_ab + SSIM_C1) * (2 * sigma_ab + SSIM_C2)
+    denominator = (mu_a_sq + mu_b_sq + SSIM_C1) * (sigma_a_sq + sigma_b_sq + SSIM_C2)
+    return float(cv2.mean(numerator / denominator)[0])
+
+
+def perceptual_hash(gray_frame: np.ndarray) -> int:
+    """
+    64-bit DCT perceptual hash (pHash) of a grayscale frame
+    
+    Args:
+        gray_frame: Grayscale uint8 frame
+        
+    Returns:
+        Hash as a Python int; similar frames differ in few bits
+    """
+    small = cv2.resize(gray_frame, (32, 32), interpolation=cv2.INTER_AREA)
+    low_freq = cv2.dct(np.float32(small))[:8, :8].ravel()
+    # Compare against the median of the AC terms (the DC term is brightness)
+    bits = low_freq > np.median(low_freq[1:])
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def with_phash_prefilter(ssim: Callable, max_distance: int) -> Tuple[Callable, Callable]:
+    """
+    Wrap an SSIM function so frame pairs whose perceptual hashes nearly match
+    are treated as identical without running SSIM
+    
+    Args:
+        ssim: SSIM function for grayscale uint8 frames
+        max_distance: Largest Hamming distance (of 64 bits) that skips SSIM
+        
+    Returns:
+        (describe, compare) pair in the get_scene_metric() format
+    """
+    def describe(gray_frame, out=None):
+        return perceptual_hash(gray_frame), gray_frame
+    
+    def compare(desc_a, desc_b):
+        if bin(desc_a[0] ^ desc_b[0]).count('1') <= max_distance:
+            return 1.0
+        return ssim(desc_a[1], desc_b[1])
+    
+    return describe, compare
+
+
+def get_ssim_function() -> Callable[[np.ndarray, np.ndarray], float]:
+    """
+    Pick the fastest available SSIM implementation: CUDA, then OpenCV's
+    compiled quality module (opencv-contrib), then fast_ssim()
+    
+    Returns:
+        Function computing the mean SSIM of two grayscale uint8 frames
+    """
+    if cv2.cuda.getCudaEnabledDeviceCount() > 0:
+        print("Using CUDA SSIM for scene detection")
+        return CudaSSIM()
+    
+    if hasattr(cv2, 'quality'):
+        return lambda frame_a, frame_b: cv2.quality.QualitySSIM_compute(frame_a, frame_b)[0][0]
+    
+    return fast_ssim
+
+
+def regional_histograms(gray_frame: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Compute a grayscale histogram for each cell of a HISTOGRAM_GRID x
+    HISTOGRAM_GRID split of the frame
+    
+    Args:
+        gray_frame: Grayscale uint8 frame
+        out: Optional float32 output buffer of the result shape
+        
+    Returns:
+        Array of shape (HISTOGRAM_GRID**2, HISTOGRAM_BINS)
+    """
+    height, width = gray_frame.shape
+    if out is None:
+        out = np.empty((HISTOGRAM_GRID * HISTOGRAM_GRID, HISTOGRAM_BINS), dtype=np.float32)
+    
+    cell_hist = None
+    for row in range(HISTOGRAM_GRID):
+        y0, y1 = row * height // HISTOGRAM_GRID, (row + 1) * height // HISTOGRAM_GRID
+        for col in range(HISTOGRAM_GRID):
+            x0, x1 = col * width // HISTOGRAM_GRID, (col + 1) * width // HISTOGRAM_GRID
+            cell = gray_frame[y0:y1, x0:x1]
+            cell_hist = cv2.calcHist([cell], [0], None, [HISTOGRAM_BINS], [0, 256], hist=cell_hist)
+            out[row * HISTOGRAM_GRID + col] = cell_hist.ravel()
+    
+    # Smooth along the bin axis so compression noise straddling a bin edge
+    # doesn't read as a content change
+    return cv2.GaussianBlur(out, (5, 1), 0, dst=out)
+
+
+def histogram_similarity(hists_a: np.ndarray, hists_b: np.ndarray) -> float:
+    """
+    Similarity of two frames from their regional histograms
+    
+    Args:
+        hists_a: Regional histograms of the first frame
+        hists_b: Regional histograms of the second frame
+        
+    Returns:
+        1 - mean Bhattacharyya distance over all regions (1 = identical)
+    """
+    distance = 0.0
+    for hist_a, hist_b in zip(hists_a, hists_b):
+        distance += cv2.compareHist(hist_a, hist_b, cv2.HISTCMP_BHATTACHARYYA)
+    return 1.0 - distance / len(hists_a)
+
+
+def get_scene_metric() -> Tuple[Callable, Callable]:
+    """
+    Get the frame descriptor and comparison function for config.SCENE_METRIC
+    
+    Returns:
+        (describe, compare) where describe(gray_frame, out=None) builds a
+        per-frame descriptor (into `out` if given) and compare(desc_a, desc_b)
+        returns a 0-1 similarity
+    """
+    if config.SCENE_METRIC == "ssim":
+        if config.SCENE_PHASH_DISTANCE > 0:
+            return with_phash_prefilter(get_ssim_function(), config.SCENE_PHASH_DISTANCE)
+        return (lambda gray_frame, out=None: gray_frame), get_ssim_function()
+    
+    if config.SCENE_METRIC != "histogram":
+        print(f"Warning: Unknown scene metric '{config.SCENE_METRIC}', using histogram")
+    return regional_histograms, histogram_similarity
+
+
+class FrameBuffers:
+    """
+    Scratch arrays for the comparison loops, allocated once per video and
+    reused for every frame. `hist_a` holds the current frame's histograms,
+    `hist_b` the previous one's; swap() exchanges them by reference.
+    """
+    
+    __slots__ = ('diff', 'hist_a', 'hist_b')
+    
+    def __init__(self, gray_shape: Tuple[int, int]):
+        self.diff = np.empty(gray_shape, dtype=np.uint8)
+        self.hist_a = np.empty((HISTOGRAM_GRID * HISTOGRAM_GRID, HISTOGRAM_BINS), dtype=np.float32)
+        self.hist_b = np.empty_like(self.hist_a)
+    
+    def swap(self):
+        """Make the current frame's buffers the previous frame's"""
+        self.hist_a, self.hist_b = self.hist_b, self.hist_a
+
+
+def save_frame_async(frame_path: Path, frame: np.ndarray) -> Future:
+    """
+    Queue a frame to be written as a JPEG (config.FRAME_JPEG_QUALITY) on the
+    shared encode pool; the caller must not modify the frame afterwards
+    
+    Args:
+        frame_path: Output path
+        frame: BGR frame
+        
+    Returns:
+        Future resolving to cv2.imwrite's success flag
+    """
+    params = [cv2.IMWRITE_JPEG_QUALITY, config.FRAME_JPEG_QUALITY, cv2.IMWRITE_JPEG_OPTIMIZE, 1]
+    return _ENCODE_POOL.submit(cv2.imwrite, str(frame_path), frame, params)
+
+
+def wait_for_frames(futures: List[Future]):
+    """
+    Block until queued frame writes finish, reporting any that failed
+    
+    Args:
+        futures: Futures from save_frame_async()
+    """
+    wait(futures)
+    failed = sum(1 for future in futures if future.exception() is not None or not future.result())
+    if failed:
+        print(f"Warning: {failed} frame image(s) could not be written")
+
+
+def analysis_size(frame_shape: Tuple[int, ...], max_dim: int = 320) -> Tuple[int, int]:
+    """
+    Get the (width, height) frames are shrunk to for comparison
+    
+    Args:
+        frame_shape: Shape of the decoded frame
+        max_dim: Maximum width/height (aspect ratio is kept)
+        
+    Returns:
+        (width, height) tuple
+    """
+    height, width = frame_shape[:2]
+    if width > max_dim or height > max_dim:
+        scale = max_dim / max(width, height)
+        return int(width * scale), int(height * scale)
+    return width, height
+
+
+def prepare_gray_frame(
+    frame: np.ndarray,
+    size: Optional[Tuple[int, int]] = None,
+    small_buf: Optional[np.ndarray] = None,
+    dst: Optional[np.ndarray] = None,
+    code: int = cv2.COLOR_BGR2GRAY
+) -> np.ndarray:
+    """
+    Shrink a color frame for comparison and convert it to grayscale, writing
+    into caller-owned uint8 buffers when given
+    
+    The frame is resized first so the color conversion only touches the
+    analysis-sized pixels (bilinear resizing and the grayscale weighting are
+    both linear, so the order barely changes the result).
+    
+    Args:
+        frame: BGR frame (RGB with code=cv2.COLOR_RGB2GRAY)
+        size: Target (width, height) from analysis_size() (computed if None)
+        small_buf: Color scratch buffer of the target size
+        dst: Output buffer of the target size
+        code: cvtColor conversion code matching the frame's channel order
+        
+    Returns:
+        Grayscale uint8 frame (dst when it was usable)
+    """
+    if size is None:
+        size = analysis_size(frame.shape)
+    
+    if size == (frame.shape[1], frame.shape[0]):
+        return cv2.cvtColor(frame, code, dst=dst)
+    
+    small_buf = cv2.resize(frame, size, dst=small_buf)
+    return cv2.cvtColor(small_buf, code, dst=dst)
+
+
+def sample_frames(cap: cv2.VideoCapture, step: int, total_frames: int, reuse_frame: bool = False):
+    """
+    Yield every `step`-th frame of a video, skipping the frames in between
+    without converting them: short gaps are grab()bed forward, long gaps are
+    seeked over when the frame count is known
+    
+    The next target is reached from wherever the capture currently is, so the
+    capture may be repositioned between iterations.
+    
+    Args:
+        cap: Opened video capture
+        step: Frame stride
+        total_frames: Frame count reported by the container (<= 0 if unknown)
+        reuse_frame: Decode every frame into the same array; only for callers
+            that are done with a frame before requesting the next one
+        
+    Yields:
+        (frame_index, BGR frame) tuples
+    """
+    frame = None
+    
+    if total_frames > 0:
+        for frame_index in range(0, total_frames, step):
+            gap = frame_index - int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+            if gap < 0 or gap > SEEK_MIN_GAP:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+            else:
+                for _ in range(gap):
+                    if not cap.grab():
+                        return
+            ret, frame = cap.read(frame if reuse_frame else None)
+            if not ret:
+                return
+            yield frame_index, frame
+        return
+    
+    # Unknown length: read sequentially, skipping conversion of unused frames
+    frame_index = 0
+    while True:
+        if frame_index % step == 0:
+            ret, frame = cap.read(frame if reuse_frame else None)
+            if not ret:
+                return
+            yield frame_index, frame
+        elif not cap.grab():
+            return
+        frame_index += 1
+
+
+def sample_frames_batched(reader, step: int, batch_size: int):
+    """
+    Yield every `step`-th frame of a video decoded in batches by decord
+    
+    Args:
+        reader: decord VideoReader
+        step: Frame stride
+        batch_size: Frames decoded per get_batch() call
+        
+    Yields:
+        (frame_index, RGB frame) tuples
+    """
+    indices = range(0, len(reader), step)
+    for start in range(0, len(indices), batch_size):
+        chunk = list(indices[start:start + batch_size])
+        batch = reader.get_batch(chunk).asnumpy()
+        for frame_index, frame in zip(chunk, batch):
+            yield frame_index, frame
+
+
+def read_frame_at(cap: cv2.VideoCapture, frame_index: int) -> Optional[np.ndarray]:
+    """
+    Seek to and decode a single frame
+    
+    Args:
+        cap: Opened video capture
+        frame_index: Frame to read
+        
+    Returns:
+        BGR frame or None if it could not be read
+    """
+    cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+    ret, frame = cap.read()
+    return frame if ret else None
+
+
+def open_frame_source(
+    video_path: Path,
+    cap: cv2.VideoCapture,
+    step: int,
+    total_frames: int,
+    reuse_frames: bool = False
+):
+    """
+    Set up sampled-frame decoding, batched through decord when it is installed
+    and enabled (config.USE_DECORD), otherwise through the OpenCV capture
+    
+    Args:
+        video_path: Path to video file
+        cap: Opened video capture (used for the OpenCV path)
+        step: Frame stride
+        total_frames: Frame count reported by the container
+        reuse_frames: Let the OpenCV path decode into a single array (see
+            sample_frames())
+        
+    Returns:
+        (frames, read_frame, gray_code, close): an iterator of
+        (frame_index, frame) tuples, a function reading a single frame by
+        index, the cvtColor code converting those frames to grayscale, and a
+        function releasing read_frame's decoder. read_frame uses its own
+        decoder (opened on first call), so it is safe to call while `frames`
+        is consumed on another thread.
+    """
+    if config.USE_DECORD and VideoReader is not None:
+        try:
+            reader = VideoReader(str(video_path), ctx=cpu(0), num_threads=config.DECODE_THREADS)
+            frames = sample_frames_batched(reader, step, config.DECODE_BATCH_SIZE)
+            
+            random_access = []
+            
+            def read_frame(frame_index):
+                if not random_access:
+                    random_access.append(VideoReader(str(video_path), ctx=cpu(0)))
+                return random_access[0][frame_index].asnumpy()
+            
+            return frames, read_frame, cv2.COLOR_RGB2GRAY, random_access.clear
+        except Exception as e:
+            print(f"Warning: decord could not open the video ({e}), using OpenCV")
+    
+    frames = sample_frames(cap, step, total_frames, reuse_frames)
+    random_access = []
+    
+    def read_frame(frame_index):
+        if not random_access:
+            random_access.append(cv2.VideoCapture(str(video_path)))
+        return read_frame_at(random_access[0], frame_index)
+    
+    def close():
+        for capture in random_access:
+            capture.release()
+        random_access.clear()
+    
+    return frames, read_frame, cv2.COLOR_BGR2GRAY, close
+
+
+def prefetch_gray_frames(
+    frames: Iterator[Tuple[int, np.ndarray]],
+    gray_code: int,
+    depth: int,
+    keep_frames: bool = True
+) -> Iterator[Tuple[int, Optional[np.ndarray], np.ndarray]]:
+    """
+    Decode, grayscale and shrink frames on a background thread, handing them
+    over through a bounded queue so decoding overlaps the comparison work
+    (both release the GIL inside OpenCV)
+    
+    Grayscale frames are written into a ring of depth + 3 buffers: the
+    consumer may keep the current and previous frame while the queue is full
+    and the producer fills the next slot, so a yielded frame stays valid
+    until two more have been taken.
+    
+    Args:
+        frames: Iterator of (frame_index, color frame) tuples
+        gray_code: cvtColor code converting the frames to grayscale
+        depth: Maximum number of frames waiting in the queue
+        keep_frames: Also hand over the full-size color frame
+        
+    Yields:
+        (frame_index, color frame or None, grayscale analysis frame) tuples
+    """
+    handoff = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    done = object()
+    
+    def put(item):
+        while not stop.is_set():
+            try:
+                handoff.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def produce():
+        try:
+            size = None
+            small_color = None
+            ring = None
+            for count, (frame_index, frame) in enumerate(frames):
+                if ring is None:
+                    size = analysis_size(frame.shape)
+                    small_color = np.empty((size[1], size[0]) + frame.shape[2:], dtype=np.uint8)
+                    ring = [np.empty((size[1], size[0]), dtype=np.uint8) for _ in range(depth + 3)]
+                
+                gray_frame = prepare_gray_frame(
+                    frame, size, small_color, ring[count % len(ring)], gray_code
+                )
+                if not put((frame_index, frame if keep_frames else None, gray_frame)):
+                    return
+            put(done)
+        except Exception as e:
+            put(e)
+    
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = handoff.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+
+
+def refine_scene_boundary(
+    read_frame: Callable[[int], Optional[np.ndarray]],
+    before_index: int,
+    after_index: int,
+    before_descriptor,
+    describe: Callable,
+    compare: Callable,
+    threshold: float,
+    size: Tuple[int, int],
+    gray_code: int = cv2.COLOR_BGR2GRAY
+) -> Tuple[int, Optional[np.ndarray], float]:
+    """
+    Binary-search the first frame after a cut between two coarse samples
+    
+    Args:
+        read_frame: Function decoding a single frame by index
+        before_index: Last sampled frame index before the cut
+        after_index: First sampled frame index after the cut
+        before_descriptor: Scene descriptor of the frame at before_index
+        describe: Descriptor function from get_scene_metric()
+        compare: Similarity function from get_scene_metric()
+        threshold: Similarity below which frames belong to different scenes
+        size: Analysis frame size from analysis_size()
+        gray_code: cvtColor code converting decoded frames to grayscale
+        
+    Returns:
+        (cut frame index, cut frame or None if no in-between frame
+        belongs to the new scene, similarity of the cut frame to the
+        pre-cut frame)
+    """
+    low, high = before_index, after_index
+    cut_frame = None
+    cut_similarity = 0.0
+    
+    while high - low > 1:
+        middle = (low + high) // 2
+        frame = read_frame(middle)
+        if frame is None:
+            break
+        
+        gray_frame = prepare_gray_frame(frame, size, code=gray_code)
+        similarity = compare(before_descriptor, describe(gray_frame))
+        if similarity < threshold:
+            high, cut_frame, cut_similarity = middle, frame, similarity
+        else:
+            low = middle
+    
+    return high, cut_frame, cut_similarity
+
+
+def _tile_mean_diff_loops(diff: np.ndarray, box_h: int, box_w: int) -> np.ndarray:
+    """
+    Mean of a uint8 absolute-difference frame per box_h x box_w tile
+    (explicit loops, compiled with Numba when available)
+    """
+    height, width = diff.shape
+    tiles_y = (height + box_h - 1) // box_h
+    tiles_x = (width + box_w - 1) // box_w
+    result = np.empty((tiles_y, tiles_x), dtype=np.float32)
+    
+    for ty in prange(tiles_y):
+        y0 = ty * box_h
+        y1 = min(y0 + box_h, height)
+        for tx in range(tiles_x):
+            x0 = tx * box_w
+            x1 = min(x0 + box_w, width)
+            total = 0
+            for y in range(y0, y1):
+                for x in range(x0, x1):
+                    total += int(diff[y, x])
+            result[ty, tx] = total / ((y1 - y0) * (x1 - x0))
+    
+    return result
+
+
+def _tile_mean_diff_numpy(diff: np.ndarray, box_h: int, box_w: int) -> np.ndarray:
+    """
+    Mean of a uint8 absolute-difference frame per box_h x box_w tile
+    (vectorized with an integral image, used when Numba is not installed)
     """
-    Detect scene changes in video using SSIM
+    height, width = diff.shape
+    integral = cv2.integral(diff)
+    
+    ys = np.append(np.arange(0, height, box_h), height)
+    xs = np.append(np.arange(0, width, box_w), width)
+    sums = (integral[ys[1:, None], xs[1:]] - integral[ys[:-1, None], xs[1:]]
+            - integral[ys[1:, None], xs[:-1]] + integral[ys[:-1, None], xs[:-1]])
+    areas = np.diff(ys)[:, None] * np.diff(xs)[None, :]
+    
+    return (sums / areas).astype(np.float32)
+
+
+if njit is not None:
+    _tile_mean_diff = njit(parallel=True, fastmath=True, nogil=True, cache=True)(_tile_mean_diff_loops)
+else:
+    _tile_mean_diff = _tile_mean_diff_numpy
+
+
+def near_scene_change(scene_times: List[float], timestamp: float, window: float = 1.0) -> bool:
+    """
+    Check whether a timestamp is within `window` seconds of a scene change
+    
+    Args:
+        scene_times: Sorted scene change timestamps
+        timestamp: Time in seconds
+        window: Distance in seconds
+        
+    Returns:
+        True if a scene change is closer than `window`
+    """
+    index = bisect.bisect_left(scene_times, timestamp)
+    if index < len(scene_times) and scene_times[index] - timestamp < window:
+        return True
+    return index > 0 and timestamp - scene_times[index - 1] < window
+
+
+def detect_scenes(
+    video_path: str,
+    output_dir: Optional[Path] = None,
+    stop: Optional[threading.Event] = None
+) -> List[Dict]:
+    """
+    Detect scene changes in video using regional histograms or SSIM
     
     Args:
         video_path: Path to video file
         output_dir: Directory to save extracted frames
+        stop: Optional event; once set, detection ends early with the
+            scenes found so far
         
     Returns:
         List of scene change dictionaries with timestamps and frame paths
@@ -52,75 +743,105 @@ def detect_scenes(video_path: str, output_dir: Optional[Path] = None) -> List[Di
         
         print(f"Video info: {total_frames} frames, {fps:.2f} FPS, {duration:.2f} seconds")
         
+        # Settings are read once; the loop below only touches locals
+        describe, compare = get_scene_metric()
+        threshold = config.SCENE_CHANGE_THRESHOLD
+        min_scene_duration = config.MIN_SCENE_DURATION
+        step = max(1, config.FRAME_SAMPLE_RATE)
+        refine = config.REFINE_SCENE_BOUNDARIES and step > 1
+        seconds_per_frame = 1.0 / fps if fps > 0 else 0.0
+        
         scene_changes = []
-        previous_frame = None
+        previous_descriptor = None
+        previous_index = 0
         previous_time = 0.0
-        frame_count = 0
         scene_index = 0
+        sample_count = 0
         
-        # Process frames
-        while True:
-            ret, frame = cap.read()
-            
-            if not ret:
+        # Buffers are swapped by reference, so the previous descriptor stays
+        # valid while the current frame is written
+        size = None
+        buffers = None
+        
+        frames, read_frame, gray_code, close_source = open_frame_source(
+            video_path, cap, step, total_frames
+        )
+        frames = prefetch_gray_frames(frames, gray_code, config.PREFETCH_FRAMES)
+        
+        # Scene frames are JPEG-encoded off the comparison thread
+        pending_writes = []
+        
+        # Coarse pass over every `step`-th frame
+        for frame_index, frame, gray_frame in frames:
+            if stop is not None and stop.is_set():
+                print("Scene detection stopped")
                 break
             
-            current_time = frame_count / fps if fps > 0 else 0
+            current_time = frame_index * seconds_per_frame
+            
+            if buffers is None:
+                size = (gray_frame.shape[1], gray_frame.shape[0])
+                buffers = FrameBuffers(gray_frame.shape)
             
-            # Process every Nth frame based on sample rate
-            if frame_count % config.FRAME_SAMPLE_RATE == 0:
-                # Convert to grayscale for SSIM comparison
-                gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            descriptor = describe(gray_frame, buffers.hist_a)
+            
+            # Compare with previous sample
+            if previous_descriptor is not None:
+                similarity = compare(previous_descriptor, descriptor)
                 
-                # Resize for faster processing (maintain aspect ratio)
-                height, width = gray_frame.shape
-                max_dim = 320
-                if width > max_dim or height > max_dim:
-                    scale = max_dim / max(width, height)
-                    new_width = int(width * scale)
-                    new_height = int(height * scale)
-                    gray_frame = cv2.resize(gray_frame, (new_width, new_height))
+                # Check if scene change detected
+                time_since_last_change = current_time - previous_time
                 
-                # Compare with previous frame
-                if previous_frame is not None:
-                    # Calculate SSIM
-                    similarity = ssim(previous_frame, gray_frame)
+                if (similarity < threshold and 
+                    time_since_last_change >= min_scene_duration):
                     
-                    # Check if scene change detected
-                    time_since_last_change = current_time - previous_time
+                    # Narrow the cut down to the exact frame between the samples
+                    if refine:
+                        cut_index, cut_frame, cut_similarity = refine_scene_boundary(
+                            read_frame, previous_index, frame_index, previous_descriptor,
+                            describe, compare, threshold, size, gray_code
+                        )
+                        if cut_frame is not None:
+                            frame, similarity = cut_frame, cut_similarity
+                            current_time = cut_index * seconds_per_frame
                     
-                    if (similarity < config.SCENE_CHANGE_THRESHOLD and 
-                        time_since_last_change >= config.MIN_SCENE_DURATION):
-                        
-                        # Save frame
-                        frame_filename = f"scene_{scene_index:04d}_{format_timestamp_readable(current_time).replace(':', '-')}.jpg"
-                        frame_path = output_dir / frame_filename
-                        
-                        cv2.imwrite(str(frame_path), frame)
-                        
-                        scene_changes.append({
-                            'index': scene_index,
-                            'timestamp': current_time,
-                            'timestamp_readable': format_timestamp_readable(current_time),
-                            'frame_path': str(frame_path),
-                            'similarity': float(similarity)
-                        })
-                        
-                        print(f"Scene change detected at {format_timestamp_readable(current_time)} "
-                              f"(similarity: {similarity:.3f})")
-                        
-                        previous_time = current_time
-                        scene_index += 1
-                
-                previous_frame = gray_frame.copy()
+                    # Save frame
+                    frame_filename = f"scene_{scene_index:04d}_{format_timestamp_readable(current_time).replace(':', '-')}.jpg"
+                    frame_path = output_dir / frame_filename
+                    
+                    if gray_code == cv2.COLOR_RGB2GRAY:
+                        frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+                    pending_writes.append(save_frame_async(frame_path, frame))
+                    
+                    scene_changes.append({
+                        'index': scene_index,
+                        'timestamp': current_time,
+                        'timestamp_readable': format_timestamp_readable(current_time),
+                        'frame_path': str(frame_path),
+                        'similarity': float(similarity)
+                    })
+                    
+                    print(f"Scene change detected at {format_timestamp_readable(current_time)} "
+                          f"(similarity: {similarity:.3f})")
+                    
+                    previous_time = current_time
+                    scene_index += 1
             
-            frame_count += 1
+            previous_descriptor = descriptor
+            previous_index = frame_index
+            buffers.swap()
+            sample_count += 1
             
             # Progress indicator
-            if frame_count % 100 == 0:
-                progress = (frame_count / total_frames) * 100
-                print(f"Progress: {progress:.1f}% ({frame_count}/{total_frames} frames)")
+            if sample_count % 100 == 0 and total_frames > 0:
+                progress = (frame_index / total_frames) * 100
+                print(f"Progress: {progress:.1f}% ({frame_index}/{total_frames} frames)")
+        
+        wait_for_frames(pending_writes)
         
+        # Stop the decode thread before releasing the captures it reads
+        frames.close()
+        close_source()
         cap.release()
         
         print(f"Scene detection completed: {len(scene_changes)} scene changes detected")
@@ -131,13 +852,19 @@ def detect_scenes(video_path: str, output_dir: Optional[Path] = None) -> List[Di
         return []
 
 
-def detect_clicks(video_path: str, scene_changes: List[Dict]) -> List[Dict]:
+def detect_clicks(
+    video_path: str,
+    scene_changes: List[Dict],
+    stop: Optional[threading.Event] = None
+) -> List[Dict]:
     """
     Detect UI interactions (clicks/small movements) using frame difference
     
     Args:
         video_path: Path to video file
         scene_changes: List of detected scene changes
+        stop: Optional event; once set, detection ends early with the
+            interactions found so far
         
     Returns:
         List of detected click/interaction dictionaries
@@ -158,67 +885,80 @@ def detect_clicks(video_path: str, scene_changes: List[Dict]) -> List[Dict]:
             return []
         
         fps = cap.get(cv2.CAP_PROP_FPS)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         clicks = []
         previous_frame = None
-        frame_count = 0
         
         # Process frames with higher frequency for click detection
         sample_rate = max(1, int(fps / 10))  # Sample ~10 frames per second
+        seconds_per_frame = 1.0 / fps if fps > 0 else 0.0
+        tile_size = config.CLICK_TILE_SIZE
+        click_threshold = config.CLICK_DETECTION_THRESHOLD * 255
         
-        while True:
-            ret, frame = cap.read()
-            
-            if not ret:
+        # Sorted so the nearest scene change is found by bisection
+        scene_times = sorted(scene['timestamp'] for scene in scene_changes)
+        
+        # uint8 difference buffer reused for every sampled frame
+        buffers = None
+        
+        # Only the grayscale copies leave the decode thread, so the full-size
+        # frame can be decoded into the same array every time
+        frames, _, gray_code, close_source = open_frame_source(
+            video_path, cap, sample_rate, total_frames, reuse_frames=True
+        )
+        
+        # Grayscale conversion and resizing happen on the decode thread
+        frames = prefetch_gray_frames(frames, gray_code, config.PREFETCH_FRAMES, keep_frames=False)
+        
+        for frame_index, _, gray_frame in frames:
+            if stop is not None and stop.is_set():
+                print("Click detection stopped")
                 break
             
-            current_time = frame_count / fps if fps > 0 else 0
+            current_time = frame_index * seconds_per_frame
             
-            # Sample frames for click detection
-            if frame_count % sample_rate == 0:
-                # Convert to grayscale
-                gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            if buffers is None:
+                buffers = FrameBuffers(gray_frame.shape)
                 
-                # Resize for faster processing
+                # A tile's mean can only exceed the threshold if the whole
+                # frame's summed difference exceeds threshold * smallest tile
+                # area (edge tiles may be partial)
                 height, width = gray_frame.shape
-                max_dim = 320
-                if width > max_dim or height > max_dim:
-                    scale = max_dim / max(width, height)
-                    new_width = int(width * scale)
-                    new_height = int(height * scale)
-                    gray_frame = cv2.resize(gray_frame, (new_width, new_height))
-                
-                if previous_frame is not None:
-                    # Calculate frame difference
-                    diff = cv2.absdiff(previous_frame, gray_frame)
-                    diff_mean = np.mean(diff)
-                    
-                    # Check if significant change (but not a scene change)
-                    is_scene_change = any(
-                        abs(scene['timestamp'] - current_time) < 1.0 
-                        for scene in scene_changes
-                    )
-                    
-                    if (diff_mean > config.CLICK_DETECTION_THRESHOLD * 255 and 
-                        not is_scene_change):
-                        
-                        # Check if this is a new click (not too close to previous)
-                        is_new_click = True
-                        if clicks:
-                            last_click_time = clicks[-1]['timestamp']
-                            if current_time - last_click_time < 0.5:  # Within 0.5 seconds
-                                is_new_click = False
-                        
-                        if is_new_click:
-                            clicks.append({
-                                'timestamp': current_time,
-                                'timestamp_readable': format_timestamp_readable(current_time),
-                                'intensity': float(diff_mean)
-                            })
-                
-                previous_frame = gray_frame.copy()
+                min_tile_area = (height % tile_size or tile_size) * (width % tile_size or tile_size)
+                min_click_sum = click_threshold * min_tile_area
+            
+            if previous_frame is None:
+                previous_frame = gray_frame
+                continue
+            
+            # Clicks are local, so score the most-changed tile rather than
+            # the whole-frame mean (all in uint8)
+            cv2.absdiff(previous_frame, gray_frame, buffers.diff)
+            previous_frame = gray_frame
+            
+            # Most samples barely change; skip the tile pass for those
+            if cv2.sumElems(buffers.diff)[0] <= min_click_sum:
+                continue
+            
+            tile_means = _tile_mean_diff(buffers.diff, tile_size, tile_size)
+            diff_mean = tile_means.max()
+            
+            # Check if significant change (but not a scene change)
+            if diff_mean <= click_threshold or near_scene_change(scene_times, current_time):
+                continue
+            
+            # Check if this is a new click (not too close to previous)
+            if clicks and current_time - clicks[-1]['timestamp'] < 0.5:  # Within 0.5 seconds
+                continue
             
-            frame_count += 1
+            clicks.append({
+                'timestamp': current_time,
+                'timestamp_readable': format_timestamp_readable(current_time),
+                'intensity': float(diff_mean)
+            })
         
+        frames.close()
+        close_source()
         cap.release()
         
         print(f"Click detection completed: {len(clicks)} interactions detected")
@@ -263,6 +1003,7 @@ def extract_key_frames(video_path: str, timestamps: List[float], output_dir: Opt
         
         fps = cap.get(cv2.CAP_PROP_FPS)
         frame_paths = []
+        pending_writes = []
         
         for timestamp in timestamps:
             frame_number = int(timestamp * fps)
@@ -273,9 +1014,10 @@ def extract_key_frames(video_path: str, timestamps: List[float], output_dir: Opt
             if ret:
                 frame_filename = f"frame_{format_timestamp_readable(timestamp).replace(':', '-')}.jpg"
                 frame_path = output_dir / frame_filename
-                cv2.imwrite(str(frame_path), frame)
+                pending_writes.append(save_frame_async(frame_path, frame))
                 frame_paths.append(str(frame_path))
         
+        wait_for_frames(pending_writes)
         cap.release()
         return frame_paths
         
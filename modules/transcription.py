@@ -1,52 +1,87 @@
 """
-Transcription module using OpenAI Whisper
+Transcription module using Whisper (faster-whisper / CTranslate2 backend)
 """
 
+import gc
 import json
+import threading
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
-import whisper
+from typing import Callable, Dict, List, Optional, Tuple, Union
+import numpy as np
+from faster_whisper import WhisperModel
 import config
-from .utils import format_timestamp, ensure_dir
+from .audio_extractor import WHISPER_SAMPLE_RATE
+from .utils import format_timestamps_bulk, ensure_dir
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-def transcribe_audio(audio_path: str, model_name: Optional[str] = None) -> Optional[Dict]:
+# Loaded models keyed by (backend, model name), kept for the process lifetime
+# so later videos skip the checkpoint load; see release_model()
+_MODEL_CACHE = {}
+_MODEL_LOCK = threading.Lock()
+
+
+def transcribe_audio(audio: Union[str, np.ndarray], model_name: Optional[str] = None) -> Optional[Dict]:
     """
     Transcribe audio using Whisper
     
     Args:
-        audio_path: Path to audio file
+        audio: Path to audio file, or 16 kHz mono float32 samples
         model_name: Whisper model name (default from config)
         
     Returns:
         Dictionary with transcription results or None if error
     """
     try:
-        audio_path = Path(audio_path)
-        
-        if not audio_path.exists():
-            print(f"Error: Audio file not found - {audio_path}")
-            return None
+        if isinstance(audio, np.ndarray):
+            audio_label = "in-memory audio"
+        else:
+            audio = Path(audio)
+            
+            if not audio.exists():
+                print(f"Error: Audio file not found - {audio}")
+                return None
+            
+            audio_label = audio.name
+            audio = str(audio)
         
         if model_name is None:
             model_name = config.WHISPER_MODEL
         
-        print(f"Loading Whisper model: {model_name}")
-        print("Note: First run will download the model (this may take a few minutes)")
+        # Batched fp16 inference when a CUDA GPU is available
+        if config.WHISPER_GPU_BATCHED:
+            result = transcribe_audio_batched(audio, model_name)
+            if result is not None:
+                return result
         
-        # Load Whisper model
-        model = whisper.load_model(model_name)
+        # Load Whisper model (CTranslate2 weights, quantized for the target device)
+        model = get_cached_model("faster-whisper", model_name, load_whisper_model)
         
-        print(f"Transcribing audio: {audio_path.name}")
+        print(f"Transcribing audio: {audio_label}")
         print("This may take a while depending on audio length...")
         
-        # Transcribe
-        result = model.transcribe(
-            str(audio_path),
+        # Transcribe (segments are yielded lazily as decoding progresses)
+        segments, info = model.transcribe(
+            audio,
             language=config.WHISPER_LANGUAGE,
-            verbose=False
+            beam_size=config.WHISPER_BEAM_SIZE,
+            vad_filter=config.WHISPER_VAD_FILTER
         )
         
+        # Materialize into the same shape as the reference Whisper result
+        segment_list = [
+            {'id': seg.id, 'start': seg.start, 'end': seg.end, 'text': seg.text}
+            for seg in segments
+        ]
+        result = {
+            'text': ''.join(seg['text'] for seg in segment_list),
+            'segments': segment_list,
+            'language': info.language
+        }
+        
         print("Transcription completed!")
         
         return result
@@ -56,6 +91,159 @@ def transcribe_audio(audio_path: str, model_name: Optional[str] = None) -> Optio
         return None
 
 
+def transcribe_audio_batched(audio: Union[str, np.ndarray], model_name: str) -> Optional[Dict]:
+    """
+    Transcribe audio on GPU with the HuggingFace ASR pipeline (fp16, batched
+    30-second chunks, Flash Attention 2 when installed)
+    
+    Args:
+        audio: Path to audio file, or 16 kHz mono float32 samples
+        model_name: Whisper model name (tiny, base, small, medium, large)
+        
+    Returns:
+        Dictionary with transcription results, or None if no CUDA GPU / 
+        transformers is unavailable or inference failed
+    """
+    try:
+        import torch
+        from transformers import pipeline
+    except ImportError:
+        return None
+    
+    if not torch.cuda.is_available():
+        return None
+    
+    try:
+        import importlib.util
+        if importlib.util.find_spec("flash_attn") is not None:
+            attn_implementation = "flash_attention_2"
+        else:
+            attn_implementation = "sdpa"
+        
+        def load_pipeline(name):
+            print(f"Loading Whisper model on GPU: openai/whisper-{name} ({attn_implementation})")
+            return pipeline(
+                "automatic-speech-recognition",
+                model=f"openai/whisper-{name}",
+                torch_dtype=torch.float16,
+                model_kwargs={"attn_implementation": attn_implementation},
+                device="cuda:0"
+            )
+        
+        pipe = get_cached_model("transformers", model_name, load_pipeline)
+        
+        generate_kwargs = {"task": "transcribe"}
+        if config.WHISPER_LANGUAGE:
+            generate_kwargs["language"] = config.WHISPER_LANGUAGE
+        
+        if isinstance(audio, np.ndarray):
+            audio = {"raw": audio, "sampling_rate": WHISPER_SAMPLE_RATE}
+        
+        print(f"Transcribing audio (batch size {config.WHISPER_BATCH_SIZE})...")
+        output = pipe(
+            audio,
+            chunk_length_s=30,
+            batch_size=config.WHISPER_BATCH_SIZE,
+            return_timestamps=True,
+            generate_kwargs=generate_kwargs
+        )
+        
+        # Translate pipeline chunks into Whisper-style segments
+        segment_list = []
+        for i, chunk in enumerate(output.get('chunks', [])):
+            start, end = chunk['timestamp']
+            start = start or 0.0
+            # The final chunk may be open-ended
+            end = end if end is not None else start
+            segment_list.append({'id': i, 'start': start, 'end': end, 'text': chunk['text']})
+        
+        print("Transcription completed!")
+        
+        return {
+            'text': output.get('text', ''),
+            'segments': segment_list,
+            'language': config.WHISPER_LANGUAGE
+        }
+        
+    except Exception as e:
+        print(f"GPU batched transcription failed, falling back to faster-whisper: {e}")
+        return None
+
+
+def get_cached_model(backend: str, model_name: str, loader: Callable):
+    """
+    Get a loaded model from the process-wide cache, loading it on first use
+    
+    Args:
+        backend: Backend name the model belongs to
+        model_name: Whisper model name
+        loader: Function loading the model from its name
+        
+    Returns:
+        Loaded model
+    """
+    key = (backend, model_name)
+    with _MODEL_LOCK:
+        model = _MODEL_CACHE.get(key)
+        if model is None:
+            print(f"Loading Whisper model: {model_name}")
+            print("Note: First run will download the model (this may take a few minutes)")
+            model = loader(model_name)
+            _MODEL_CACHE[key] = model
+        return model
+
+
+def release_model(model_name: Optional[str] = None):
+    """
+    Drop cached Whisper models to free (V)RAM
+    
+    Args:
+        model_name: Model to release (all cached models if None)
+    """
+    with _MODEL_LOCK:
+        for key in list(_MODEL_CACHE):
+            if model_name is None or key[1] == model_name:
+                del _MODEL_CACHE[key]
+    
+    gc.collect()
+    try:
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    except ImportError:
+        pass
+
+
+def load_whisper_model(model_name: str) -> WhisperModel:
+    """
+    Load a faster-whisper model on the configured (or best available) device
+    
+    Args:
+        model_name: Whisper model name (tiny, base, small, medium, large)
+        
+    Returns:
+        Loaded WhisperModel instance
+    """
+    import ctranslate2
+    
+    device = config.WHISPER_DEVICE
+    if device == "auto":
+        device = "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+    
+    compute_type = config.WHISPER_COMPUTE_TYPE
+    if compute_type is None:
+        # int8 weights with fp16 activations on GPU (plain fp16 on GPUs
+        # without int8 support), plain int8 on CPU
+        supported = ctranslate2.get_supported_compute_types(device)
+        if device == "cuda":
+            compute_type = "int8_float16" if "int8_float16" in supported else "float16"
+        else:
+            compute_type = "int8" if "int8" in supported else "float32"
+    
+    print(f"Using device: {device}, compute type: {compute_type}")
+    return WhisperModel(model_name, device=device, compute_type=compute_type)
+
+
 def generate_srt(transcription_result: Dict, output_path: Optional[str] = None) -> Optional[str]:
     """
     Generate SRT subtitle file from Whisper transcription
@@ -83,16 +271,21 @@ def generate_srt(transcription_result: Dict, output_path: Optional[str] = None)
         
         print(f"Generating SRT file: {output_path}")
         
+        # Format every boundary up front in one bulk call
+        timestamps = format_timestamps_bulk(
+            [segment['start'] for segment in segments] + [segment['end'] for segment in segments]
+        )
+        start_times = timestamps[:len(segments)]
+        end_times = timestamps[len(segments):]
+        
+        # One SRT entry per string, written in a single call
+        entries = [
+            f"{i}\n{start_time} --> {end_time}\n{segment['text'].strip()}\n\n"
+            for i, (segment, start_time, end_time) in enumerate(zip(segments, start_times, end_times), 1)
+        ]
+        
         with open(output_path, 'w', encoding='utf-8') as f:
-            for i, segment in enumerate(segments, 1):
-                start_time = format_timestamp(segment['start'])
-                end_time = format_timestamp(segment['end'])
-                text = segment['text'].strip()
-                
-                # Write SRT entry
-                f.write(f"{i}\n")
-                f.write(f"{start_time} --> {end_time}\n")
-                f.write(f"{text}\n\n")
+            f.writelines(entries)
         
         print(f"SRT file generated: {output_path}")
         return str(output_path)
@@ -147,8 +340,16 @@ def save_transcription_json(transcription_result: Dict, output_path: Optional[st
             output_path = Path(output_path)
             output_path.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(transcription_result, f, indent=2, ensure_ascii=False)
+        if orjson is not None:
+            # orjson serializes straight to UTF-8 bytes, several times faster
+            with open(output_path, 'wb') as f:
+                f.write(orjson.dumps(
+                    transcription_result,
+                    option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+                ))
+        else:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(transcription_result, f, indent=2, ensure_ascii=False)
         
         print(f"Transcription JSON saved: {output_path}")
         return str(output_path)
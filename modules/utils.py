@@ -4,14 +4,61 @@ Utility functions for the Meeting Video Captioning & Documentation Program
 
 import os
 import shutil
+import subprocess
+import functools
+from enum import IntEnum
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
 import re
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+# Tables and patterns are built once at import time; these helpers run on every input
+# URL and on each candidate filename while downloading.
+INVALID_FILENAME_CHARS = str.maketrans(
+    dict.fromkeys('<>:"/\\|?*' + ''.join(map(chr, range(32))), '_'))
+
+# URLs are split by hand and each piece matched on its own, so validation stays
+# linear in the input instead of backtracking over one large pattern
+MAX_URL_LENGTH = 2048
+URL_SCHEMES = ('http://', 'https://')
+DOMAIN_LABEL_PATTERN = re.compile(r'[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?', re.IGNORECASE)
+TLD_PATTERN = re.compile(r'[A-Z]{2,6}', re.IGNORECASE)
+IPV4_PATTERN = re.compile(r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}')
+PORT_PATTERN = re.compile(r'\d+')
+WHITESPACE_PATTERN = re.compile(r'\s')
+
+# Known hosts, matched against a URL's host through HOST_CLASS_PATTERN
+YOUTUBE_DOMAINS = ('youtube.com', 'youtu.be', 'youtube-nocookie.com')
+
+CLOUD_STORAGE_DOMAINS = ('drive.google.com', 'dropbox.com', 'onedrive.live.com', '1drv.ms')
+
+# youtube.com paths whose next segment is the video ID
+YOUTUBE_ID_PATHS = ('/shorts/', '/embed/', '/live/')
+
+# Both host families in one pattern, matched against the URL's host (the
+# domain itself or a subdomain of it) by classify_host()
+HOST_CLASS_PATTERN = re.compile(
+    r'(?:^|\.)(?:(?P<youtube>' + '|'.join(map(re.escape, YOUTUBE_DOMAINS)) + r')'
+    r'|(?P<cloud>' + '|'.join(map(re.escape, CLOUD_STORAGE_DOMAINS)) + r'))\.?$',
+    re.IGNORECASE)
+
+BYTES_TO_MB = 1.0 / (1024 * 1024)
+
+# OpenCV module, imported on first use by _get_cv2()
+_cv2 = None
 
 
 def format_timestamp(seconds: float) -> str:
     """
-    Convert seconds to SRT timestamp format (HH:MM:SS,mmm)
+    Convert seconds to SRT timestamp format (HH:MM:SS,mmm); see
+    format_timestamps_bulk() for whole SRT files
     
     Args:
         seconds: Time in seconds
@@ -19,16 +66,69 @@ def format_timestamp(seconds: float) -> str:
     Returns:
         Formatted timestamp string
     """
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
-    millis = int((seconds % 1) * 1000)
+    # Work in whole milliseconds so the fraction isn't re-derived with float %
+    secs, millis = divmod(round(seconds * 1000), 1000)
+    minutes, secs = divmod(secs, 60)
+    hours, minutes = divmod(minutes, 60)
     return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
 
 
+def _split_timestamps_loops(millis: np.ndarray) -> np.ndarray:
+    """
+    Split whole milliseconds into (hours, minutes, seconds, millis) rows
+    (plain loops, compiled with Numba when it is installed)
+    """
+    parts = np.empty((millis.shape[0], 4), dtype=np.int64)
+    for i in range(millis.shape[0]):
+        total = millis[i]
+        parts[i, 3] = total % 1000
+        total //= 1000
+        parts[i, 2] = total % 60
+        total //= 60
+        parts[i, 1] = total % 60
+        parts[i, 0] = total // 60
+    return parts
+
+
+def _split_timestamps_numpy(millis: np.ndarray) -> np.ndarray:
+    """
+    Split whole milliseconds into (hours, minutes, seconds, millis) rows
+    (vectorized, used when Numba is not installed)
+    """
+    secs, ms = np.divmod(millis, 1000)
+    minutes, secs = np.divmod(secs, 60)
+    hours, minutes = np.divmod(minutes, 60)
+    return np.stack((hours, minutes, secs, ms), axis=1)
+
+
+if njit is not None:
+    _split_timestamps = njit(nogil=True, cache=True)(_split_timestamps_loops)
+else:
+    _split_timestamps = _split_timestamps_numpy
+
+
+def format_timestamps_bulk(seconds) -> List[str]:
+    """
+    Convert many times to SRT timestamp format (HH:MM:SS,mmm) at once; the
+    arithmetic runs in a single compiled or vectorized pass
+    
+    Args:
+        seconds: Sequence or array of times in seconds
+        
+    Returns:
+        List of formatted timestamp strings, same order as the input
+    """
+    millis = np.rint(np.asarray(seconds, dtype=np.float64) * 1000).astype(np.int64)
+    return [
+        f"{hours:02d}:{minutes:02d}:{secs:02d},{ms:03d}"
+        for hours, minutes, secs, ms in _split_timestamps(millis).tolist()
+    ]
+
+
+@functools.lru_cache(maxsize=8192)
 def format_timestamp_readable(seconds: float) -> str:
     """
-    Convert seconds to readable format (HH:MM:SS)
+    Convert seconds to readable format (HH:MM:SS); results are cached
     
     Args:
         seconds: Time in seconds
@@ -36,17 +136,18 @@ def format_timestamp_readable(seconds: float) -> str:
     Returns:
         Formatted timestamp string
     """
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
     if hours > 0:
         return f"{hours:02d}:{minutes:02d}:{secs:02d}"
     return f"{minutes:02d}:{secs:02d}"
 
 
+@functools.lru_cache(maxsize=512)
 def clean_filename(filename: str) -> str:
     """
-    Clean filename to remove invalid characters
+    Clean filename to remove invalid characters; results are cached since
+    the same title is cleaned for several output files
     
     Args:
         filename: Original filename
@@ -54,9 +155,8 @@ def clean_filename(filename: str) -> str:
     Returns:
         Cleaned filename
     """
-    # Remove invalid characters for Windows/Linux/Mac
-    invalid_chars = r'[<>:"/\\|?*]'
-    cleaned = re.sub(invalid_chars, '_', filename)
+    # Remove invalid characters for Windows/Linux/Mac (plus control characters)
+    cleaned = filename.translate(INVALID_FILENAME_CHARS)
     # Remove leading/trailing spaces and dots
     cleaned = cleaned.strip(' .')
     return cleaned
@@ -64,7 +164,8 @@ def clean_filename(filename: str) -> str:
 
 def get_video_duration(video_path: str) -> Optional[float]:
     """
-    Get video duration in seconds using OpenCV
+    Get video duration in seconds, read from the container header with
+    ffprobe (OpenCV if ffprobe is missing); cached per file version
     
     Args:
         video_path: Path to video file
@@ -73,7 +174,46 @@ def get_video_duration(video_path: str) -> Optional[float]:
         Duration in seconds or None if error
     """
     try:
+        stat = os.stat(video_path)
+    except OSError as e:
+        print(f"Error getting video duration: {e}")
+        return None
+    return _probe_video_duration(str(video_path), stat.st_mtime_ns, stat.st_size)
+
+
+def _get_cv2():
+    """
+    Import OpenCV on first use and keep the module for later calls
+    """
+    global _cv2
+    if _cv2 is None:
         import cv2
+        _cv2 = cv2
+    return _cv2
+
+
+@functools.lru_cache(maxsize=128)
+def _probe_video_duration(video_path: str, mtime_ns: int, size: int) -> Optional[float]:
+    """
+    Probe a video's duration; mtime_ns and size only key the cache so an
+    overwritten file is probed again
+    """
+    if has_ffprobe():
+        try:
+            result = subprocess.run(
+                ['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+                 '-of', 'default=noprint_wrappers=1:nokey=1', video_path],
+                capture_output=True,
+                text=True,
+                timeout=30
+            )
+            if result.returncode == 0:
+                return float(result.stdout.strip())
+        except (ValueError, subprocess.TimeoutExpired):
+            pass
+    
+    try:
+        cv2 = _get_cv2()
         cap = cv2.VideoCapture(video_path)
         if not cap.isOpened():
             return None
@@ -89,6 +229,28 @@ def get_video_duration(video_path: str) -> Optional[float]:
         return None
 
 
+@functools.lru_cache(maxsize=1)
+def has_ffmpeg() -> bool:
+    """
+    Check if FFmpeg is available on PATH (looked up once per process)
+    
+    Returns:
+        True if FFmpeg is available, False otherwise
+    """
+    return shutil.which("ffmpeg") is not None
+
+
+@functools.lru_cache(maxsize=1)
+def has_ffprobe() -> bool:
+    """
+    Check if ffprobe is available on PATH (looked up once per process)
+    
+    Returns:
+        True if ffprobe is available, False otherwise
+    """
+    return shutil.which("ffprobe") is not None
+
+
 def ensure_dir(directory: Path) -> Path:
     """
     Ensure directory exists, create if it doesn't
@@ -113,14 +275,73 @@ def is_valid_url(url: str) -> bool:
     Returns:
         True if valid URL, False otherwise
     """
-    url_pattern = re.compile(
-        r'^https?://'  # http:// or https://
-        r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  # domain...
-        r'localhost|'  # localhost...
-        r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...or ip
-        r'(?::\d+)?'  # optional port
-        r'(?:/?|[/?]\S+)$', re.IGNORECASE)
-    return url_pattern.match(url) is not None
+    if len(url) > MAX_URL_LENGTH or not url[:8].lower().startswith(URL_SCHEMES):
+        return False
+    
+    # The part after the authority must not contain spaces
+    authority, tail = split_url(url)
+    if WHITESPACE_PATTERN.search(tail):
+        return False
+    
+    host, colon, port = authority.partition(':')
+    if colon and not PORT_PATTERN.fullmatch(port):
+        return False
+    
+    return is_valid_host(host)
+
+
+def split_url(url: str) -> Tuple[str, str]:
+    """
+    Split a URL after its scheme into the authority (host and port, up to
+    the first '/' or '?') and the rest
+    
+    Args:
+        url: URL to split
+        
+    Returns:
+        Tuple of (authority, rest); both are empty if the URL has no scheme
+    """
+    rest = url.partition('://')[2]
+    end = len(rest)
+    for separator in '/?':
+        index = rest.find(separator)
+        if index != -1 and index < end:
+            end = index
+    return rest[:end], rest[end:]
+
+
+def classify_host(url: str) -> Optional[str]:
+    """
+    Match a URL's host against the YouTube and cloud storage domains
+    
+    Args:
+        url: URL to check
+        
+    Returns:
+        'youtube', 'cloud' or None
+    """
+    host = split_url(url)[0].partition(':')[0]
+    match = HOST_CLASS_PATTERN.search(host)
+    return match.lastgroup if match is not None else None
+
+
+def is_valid_host(host: str) -> bool:
+    """
+    Check if string is a domain name, localhost or an IPv4 address
+    
+    Args:
+        host: Host part of a URL (without port)
+        
+    Returns:
+        True if valid host, False otherwise
+    """
+    if host.lower() == 'localhost' or IPV4_PATTERN.fullmatch(host):
+        return True
+    
+    labels = host[:-1].split('.') if host.endswith('.') else host.split('.')
+    if len(labels) < 2 or not TLD_PATTERN.fullmatch(labels[-1]):
+        return False
+    return all(DOMAIN_LABEL_PATTERN.fullmatch(label) for label in labels[:-1])
 
 
 def is_youtube_url(url: str) -> bool:
@@ -133,12 +354,7 @@ def is_youtube_url(url: str) -> bool:
     Returns:
         True if YouTube URL, False otherwise
     """
-    youtube_patterns = [
-        r'youtube\.com',
-        r'youtu\.be',
-        r'youtube-nocookie\.com'
-    ]
-    return any(re.search(pattern, url, re.IGNORECASE) for pattern in youtube_patterns)
+    return classify_host(url) == 'youtube'
 
 
 def is_cloud_storage_url(url: str) -> bool:
@@ -151,28 +367,116 @@ def is_cloud_storage_url(url: str) -> bool:
     Returns:
         True if cloud storage URL, False otherwise
     """
-    cloud_patterns = [
-        r'drive\.google\.com',
-        r'dropbox\.com',
-        r'onedrive\.live\.com',
-        r'1drv\.ms'
-    ]
-    return any(re.search(pattern, url, re.IGNORECASE) for pattern in cloud_patterns)
+    return classify_host(url) == 'cloud'
 
 
-def get_file_size_mb(file_path: str) -> float:
+class UrlClassification(NamedTuple):
     """
-    Get file size in megabytes
+    Result of classify_url()
+    """
+    is_valid: bool
+    is_youtube: bool
+    is_cloud: bool
+    video_id: Optional[str]
+
+
+def classify_url(url: str) -> UrlClassification:
+    """
+    Validate and classify a URL in one call instead of running the three
+    separate checks, picking up the YouTube video ID on the way
     
     Args:
-        file_path: Path to file
+        url: URL to check
         
     Returns:
-        Size in MB
+        UrlClassification (video_id is None unless a YouTube ID was found)
+    """
+    host_class = classify_host(url)
+    is_youtube = host_class == 'youtube'
+    is_cloud = host_class == 'cloud'
+    video_id = get_youtube_video_id(url) if is_youtube else None
+    return UrlClassification(is_valid_url(url), is_youtube, is_cloud, video_id)
+
+
+def get_youtube_video_id(url: str) -> Optional[str]:
+    """
+    Extract the video ID from a YouTube URL (watch?v=, youtu.be/, /shorts/,
+    /embed/ and /live/ forms)
+    
+    Args:
+        url: YouTube URL
+        
+    Returns:
+        Video ID or None if the URL has none
     """
     try:
-        size_bytes = os.path.getsize(file_path)
-        return size_bytes / (1024 * 1024)
-    except Exception:
-        return 0.0
+        parts = urlsplit(url)
+    except ValueError:
+        return None
+    
+    video_ids = parse_qs(parts.query).get('v')
+    if video_ids:
+        return video_ids[0]
+    
+    path = parts.path
+    if (parts.hostname or '').endswith('youtu.be'):
+        return path.lstrip('/').partition('/')[0] or None
+    for prefix in YOUTUBE_ID_PATHS:
+        if path.startswith(prefix):
+            return path[len(prefix):].partition('/')[0] or None
+    return None
+
+
+class UrlKind(IntEnum):
+    """
+    Source category assigned by classify_urls()
+    """
+    INVALID = 0
+    YOUTUBE = 1
+    CLOUD = 2
+    GENERIC = 3
+
+
+def classify_urls(urls: List[str]) -> List[UrlKind]:
+    """
+    Classify a batch of URLs in a single pass, one host-pattern search per
+    valid URL
+    
+    Args:
+        urls: URLs to classify
+        
+    Returns:
+        List of UrlKind tags, same order as urls
+    """
+    kinds = []
+    for url in urls:
+        if not is_valid_url(url):
+            kinds.append(UrlKind.INVALID)
+            continue
+        host_class = classify_host(url)
+        if host_class is None:
+            kinds.append(UrlKind.GENERIC)
+        elif host_class == 'youtube':
+            kinds.append(UrlKind.YOUTUBE)
+        else:
+            kinds.append(UrlKind.CLOUD)
+    return kinds
 
+
+def get_file_size_mb(file_path: str, stat: Optional[os.stat_result] = None) -> float:
+    """
+    Get file size in megabytes
+    
+    Args:
+        file_path: Path to file
+        stat: Optional os.stat() result the caller already has for file_path
+        
+    Returns:
+        Size in MB (0.0 if the file does not exist)
+    """
+    if stat is None:
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            return 0.0
+    return stat.st_size * BYTES_TO_MB